@@ -0,0 +1,154 @@
+"""
+Concurrent-edit stress test.
+
+Runs the app in-process against a scratch database and has --workers
+threads act like technicians: inline /update edits, full /edit saves and
+add/delete pairs, as fast as they can, optionally while a large CSV merge
+import keeps the database write lock busy. Every write goes through the
+single-writer queue, so none of them should ever see "database is locked".
+
+    python benchmarks/concurrent_edits.py
+    python benchmarks/concurrent_edits.py --workers 32 --edits 200 --rows 50000
+
+Exits with status 1 when any request fails.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+from ws_latency import write_fleet_csv  # noqa: E402
+
+ROOT = os.path.dirname(ROOT)
+JSON = {"accept": "application/json"}
+STATUSES = ["Ready to Upgrade", "In Progress", "Completed", "Not Compatible"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=16, help="concurrent editors (default: %(default)s)")
+    parser.add_argument("--edits", type=int, default=100, help="edits per worker (default: %(default)s)")
+    parser.add_argument("--rows", type=int, default=20000, help="workstations in the seed import (default: %(default)s)")
+    parser.add_argument("--clients", type=int, default=200, help="distinct clients (default: %(default)s)")
+    parser.add_argument("--no-import", action="store_true", help="skip the concurrent merge import")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="concurrent_edits_")
+    for name in ("templates", "static"):
+        os.symlink(os.path.join(ROOT, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+    from models import Workstation
+
+    csv_path = os.path.join(workdir, "fleet.csv")
+    print(f"Generating {args.rows} rows across {args.clients} clients...")
+    write_fleet_csv(csv_path, args.rows, args.clients)
+    # Same machines with fresh random specs, so the merge rewrites every row
+    merge_path = os.path.join(workdir, "fleet_merge.csv")
+    write_fleet_csv(merge_path, args.rows, args.clients)
+
+    results = Counter()
+    errors = Counter()
+    lock = threading.Lock()
+
+    def record(kind, response):
+        ok = response.status_code == 200
+        # /update answers 200 with ok=false for a bad field or a missing row
+        if ok and kind == "update":
+            ok = response.json().get("ok", False)
+        with lock:
+            if ok:
+                results[kind] += 1
+            else:
+                errors[f"{kind} {response.status_code}: {response.text[:80]}"] += 1
+
+    with TestClient(app_module.app, raise_server_exceptions=False) as client:
+        def upload(path, mode):
+            with open(path, "rb") as fh:
+                job = client.post(
+                    "/import", files={"file": ("fleet.csv", fh)}, data={"mode": mode},
+                    headers=JSON,
+                ).json()["job"]
+            while True:
+                job = client.get(f"/import/jobs/{job['id']}").json()
+                if job["status"] not in ("queued", "running"):
+                    return job
+                time.sleep(0.05)
+
+        print("Loading the initial import...")
+        upload(csv_path, "replace")
+        with app_module.SessionLocal() as db:
+            machines = db.query(Workstation.id, Workstation.client_id, Workstation.computer_name).all()
+        client_ids = sorted({m.client_id for m in machines})
+
+        def editor(n):
+            for i in range(args.edits):
+                roll = random.random()
+                ws_id, client_id, name = random.choice(machines)
+                if roll < 0.7:
+                    field, value = random.choice([
+                        ("notes", f"worker {n} edit {i}"),
+                        ("technician", f"Tech {n}"),
+                        ("status", random.choice(STATUSES)),
+                        ("updated_in_automate", random.choice(["true", "false"])),
+                    ])
+                    record("update", client.post("/update", data={"id": ws_id, "field": field, "value": value}))
+                elif roll < 0.9:
+                    record("edit", client.post(f"/workstations/{ws_id}/edit", data={
+                        "computer_name": name, "processor_name": "AMD Ryzen 5 3600",
+                        "ram_gb": "16", "diskspace_remaining_gb": "100", "status": random.choice(STATUSES),
+                        "technician": f"Tech {n}", "notes": f"worker {n} save {i}",
+                    }, headers=JSON))
+                else:
+                    response = client.post("/workstations/add", data={
+                        "client_id": random.choice(client_ids), "computer_name": f"STRESS-{n}-{i}",
+                        "processor_name": "AMD Ryzen 5 3600", "ram_gb": "8", "diskspace_remaining_gb": "50",
+                        "status": "Ready to Upgrade",
+                    }, headers=JSON)
+                    record("add", response)
+                    if response.status_code == 200:
+                        record("delete", client.post(f"/workstations/{response.json()['id']}/delete", headers=JSON))
+
+        importer = None
+        if not args.no_import:
+            importer = threading.Thread(target=lambda: results.update({f"import {upload(merge_path, 'merge')['status']}": 1}))
+            importer.start()
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=editor, args=(n,)) for n in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        if importer:
+            importer.join()
+        writes = client.get("/db/stats").json()["writes"]
+
+    total = sum(v for k, v in results.items() if not k.startswith("import"))
+    print(f"\n{total} writes from {args.workers} workers in {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+    print("  " + ", ".join(f"{v} {k}" for k, v in sorted(results.items())))
+    print(f"  write queue: {writes['jobs']} jobs in {writes['commits']} commits "
+          f"(avg batch {writes['avg_batch']}, largest {writes['largest_batch']}, "
+          f"{writes['lock_retries']} lock retries)")
+    if errors:
+        print(f"FAIL: {sum(errors.values())} failed requests")
+        for message, count in errors.most_common(10):
+            print(f"  {count} x {message}")
+        return 1
+    print("OK: no lock errors")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+"""
+ConnectWise ticket creation latency.
+
+Starts the mock ConnectWise server (benchmarks/mock_connectwise.py) on a
+local port and runs the app in-process against a scratch database. The
+app's ConnectWise client points at the mock. It imports --tickets ready
+clients and calls POST /create-project-ticket/{id} for each,
+--concurrency at a time. Reports end-to-end latency percentiles and how
+many ConnectWise requests each ticket cost, per endpoint.
+
+    python benchmarks/cw_latency.py
+    python benchmarks/cw_latency.py --tickets 200 --latency-ms 120 --throttle-rate 0.05
+    python benchmarks/cw_latency.py --companies 20000 --max-p95-ms 800
+
+Exits with status 1 when a ticket fails without injected errors, or when
+the p95 exceeds --max-p95-ms.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS)
+from mock_connectwise import add_arguments, from_arguments  # noqa: E402
+from ws_latency import percentile, write_fleet_csv  # noqa: E402
+
+ROOT = os.path.dirname(BENCHMARKS)
+JSON = {"accept": "application/json"}
+
+
+def start_mock(mock):
+    """Serve the mock on a free local port from a background thread; returns (base_url, server)."""
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(mock.app, log_level="warning"))
+    threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{sock.getsockname()[1]}", server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=100, help="ready clients to create tickets for (default: %(default)s)")
+    parser.add_argument("--workstations", type=int, default=5, help="workstations per client (default: %(default)s)")
+    parser.add_argument("--technicians", type=int, default=2, help="technicians per client (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="ticket requests in flight (default: %(default)s)")
+    parser.add_argument("--app-rate-limit", default="10", help="the app's CW_RATE_LIMIT, 0 = off (default: %(default)s)")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="fail above this p95 ticket latency")
+    parser.add_argument("--verbose", action="store_true", help="show the app's log output")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.tickets > args.companies:
+        parser.error("--tickets can't exceed --companies (every client needs a ConnectWise company)")
+
+    mock = from_arguments(args)
+    base_url, server = start_mock(mock)
+    print(f"Mock ConnectWise at {base_url}: {args.companies} companies, {args.members} members, "
+          f"{args.latency_ms:g}+{args.jitter_ms:g} ms latency")
+
+    # The app reads its ConnectWise settings at import and uses ./database.db
+    os.environ.update({"CW_BASE_URL": base_url, "CW_COMPANY_CACHE": "", "CW_RATE_LIMIT": args.app_rate_limit})
+    workdir = tempfile.mkdtemp(prefix="cw_latency_")
+    for name in ("templates", "static"):
+        os.symlink(os.path.join(ROOT, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+    from models import Workstation
+
+    csv_path = os.path.join(workdir, "fleet.csv")
+    write_fleet_csv(csv_path, args.tickets * args.workstations, args.tickets)
+    log = io.StringIO()
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log)
+
+    with TestClient(app_module.app, raise_server_exceptions=False) as client:
+        with open(csv_path, "rb") as fh:
+            job = client.post("/import", files={"file": ("fleet.csv", fh)}, headers=JSON).json()["job"]
+        while client.get(f"/import/jobs/{job['id']}").json()["status"] in ("queued", "running"):
+            time.sleep(0.05)
+
+        # Every workstation gets a status and one of its client's technicians, so every client is ready
+        with app_module.SessionLocal() as db:
+            machines = db.query(Workstation.id, Workstation.client_id).order_by(Workstation.id).all()
+        client_ids = sorted({m.client_id for m in machines})
+        changes = []
+        seen = Counter()
+        for ws_id, client_id in machines:
+            tech = (client_id * args.technicians + seen[client_id] % args.technicians) % args.members
+            seen[client_id] += 1
+            changes += [{"id": ws_id, "field": "technician", "value": f"Tech {tech}"},
+                        {"id": ws_id, "field": "status", "value": "Scheduled"}]
+        for start in range(0, len(changes), 5000):
+            client.post("/update/batch", json={"changes": changes[start:start + 5000]})
+
+        # Let the startup warm-up load the company and member directories
+        started = time.perf_counter()
+        while True:
+            stats = client.get("/connectwise/stats").json()
+            if stats["companies"]["refreshes"] and stats["members"]["refreshes"]:
+                break
+            if time.perf_counter() - started > 120:
+                print("FAIL: directory warm-up did not finish")
+                return 1
+            time.sleep(0.05)
+        warm_up = mock.stats()["requests"]
+        print(f"Directories warmed up with {warm_up} requests in {time.perf_counter() - started:.2f}s")
+        mock.reset()
+
+        latencies = []
+        outcomes = Counter()
+        failures = Counter()
+
+        def create(client_id):
+            t0 = time.perf_counter()
+            response = client.post(f"/create-project-ticket/{client_id}")
+            elapsed = time.perf_counter() - t0
+            body = response.json()
+            latencies.append(elapsed)
+            if response.status_code == 200:
+                unassigned = sum(1 for a in body.get("assignments", []) if not a["assigned"])
+                outcomes["created" if not unassigned else "created, some technicians unassigned"] += 1
+            else:
+                outcomes[f"HTTP {response.status_code}"] += 1
+                failures[f"{response.status_code}: {str(body.get('error'))[:80]}"] += 1
+
+        print(f"Creating {len(client_ids)} tickets, {args.concurrency} at a time...")
+        started = time.perf_counter()
+        with quiet, ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(create, client_ids))
+        elapsed = time.perf_counter() - started
+        cw_stats = client.get("/connectwise/stats").json()
+
+    server.should_exit = True
+    stats = mock.stats()
+    created = sum(v for k, v in outcomes.items() if k.startswith("created")) or 1
+    ms = [v * 1000 for v in latencies]
+    print(f"\n{len(latencies)} ticket requests in {elapsed:.2f}s ({len(latencies) / elapsed:.1f}/s)")
+    print("  " + ", ".join(f"{v} {k}" for k, v in sorted(outcomes.items())))
+    print(f"  latency ms: p50 {percentile(ms, 50):.0f}, p90 {percentile(ms, 90):.0f}, p95 {percentile(ms, 95):.0f}, "
+          f"p99 {percentile(ms, 99):.0f}, max {max(ms):.0f}")
+    print(f"  ConnectWise requests: {stats['requests']} ({stats['requests'] / created:.2f} per created ticket)")
+    for endpoint, count in stats["by_endpoint"].items():
+        print(f"    {endpoint:<32} {count:>6}  {count / created:.2f}/ticket")
+    print(f"  responses by status: {stats['by_status']}")
+    print(f"  app: {cw_stats['rate_limited']} rate limited, {cw_stats['rate_limit_waits']} limiter waits")
+    for message, count in failures.most_common(5):
+        print(f"  {count} x {message}")
+
+    injected = args.error_rate or args.throttle_rate or args.rate_limit
+    if failures and not injected:
+        print(f"FAIL: {sum(failures.values())} tickets failed with no injected errors")
+        return 1
+    if args.max_p95_ms is not None and percentile(ms, 95) > args.max_p95_ms:
+        print(f"FAIL: p95 {percentile(ms, 95):.0f} ms > {args.max_p95_ms:g} ms")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,230 @@
+"""
+End-to-end benchmark suite over synthetic fleets.
+
+For each --sizes entry, generates a fleet (benchmarks/generate_fleet.py)
+and times the main data paths against a scratch database:
+
+    import            import_csv_to_db, replace mode
+    context           build_dashboard_context, all rows / paged
+    context_paged
+    fragment          GET /fragment with a cold render cache, all rows / paged
+    fragment_paged
+    fragment_cached   GET /fragment served from the render cache
+    export_csv        GET /export?format=csv, whole body
+    update            POST /update of one field (per request)
+    stats             compute_stats after invalidation (the GROUP BY)
+
+Results are written as JSON. With --baseline, each median is compared to
+the saved one; a case counts as a regression when it is more than
+--tolerance slower and more than --min-delta-ms slower.
+
+    python benchmarks/fleet_suite.py --sizes 10000,100000 --output results.json
+    python benchmarks/fleet_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/fleet_suite.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+Baselines are only comparable on the same machine. Exits with status 1
+on any regression.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS)
+from generate_fleet import generate_fleet  # noqa: E402
+
+ROOT = os.path.dirname(BENCHMARKS)
+CASES = ["import", "context", "context_paged", "fragment", "fragment_paged", "fragment_cached",
+         "export_csv", "update", "stats"]
+STATUSES = ["Assigned", "Ready to Upgrade", "Scheduled", "In Progress", "Completed"]
+
+
+def timed(fn, repeat):
+    """Seconds per call for `repeat` calls."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return runs
+
+
+def summarize(runs):
+    ms = [r * 1000 for r in runs]
+    return {"median_ms": round(statistics.median(ms), 3), "min_ms": round(min(ms), 3),
+            "max_ms": round(max(ms), 3), "runs": len(ms)}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """[(size, case, baseline ms, current ms)] for cases that got slower beyond both thresholds."""
+    regressions = []
+    for size, cases in results["sizes"].items():
+        for case, current in cases.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(case)
+            if not before:
+                continue
+            old, new = before["median_ms"], current["median_ms"]
+            if new > old * (1 + tolerance) and new - old > min_delta_ms:
+                regressions.append((size, case, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated fleet sizes (default: %(default)s)")
+    parser.add_argument("--clients-per", type=int, default=50, help="one client per this many machines (default: %(default)s)")
+    parser.add_argument("--skew", type=float, default=1.1, help="client size skew, see generate_fleet.py (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1, help="fleet and edit seed (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median is reported (default: %(default)s)")
+    parser.add_argument("--updates", type=int, default=50, help="POST /update calls timed per size (default: %(default)s)")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases to run (default: all)")
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write the results to PATH as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs the baseline (default: %(default)s)")
+    parser.add_argument("--min-delta-ms", type=float, default=5, help="ignore slowdowns smaller than this (default: %(default)s)")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+    # Paths are relative to where the suite was started, not the scratch dir
+    outputs = [os.path.abspath(p) for p in (args.output, args.save_baseline) if p]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+    # The app uses ./database.db, ./templates and ./static; run it in a scratch dir
+    workdir = tempfile.mkdtemp(prefix="fleet_suite_")
+    for name in ("templates", "static"):
+        os.symlink(os.path.join(ROOT, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+    from models import Workstation
+    from utils import import_csv_to_db
+
+    results = {"environment": environment(), "settings": {
+        "clients_per": args.clients_per, "skew": args.skew, "seed": args.seed,
+        "repeat": args.repeat, "updates": args.updates, "profile": app_module.SQLITE_PROFILE,
+    }, "sizes": {}}
+    rng = random.Random(args.seed)
+
+    with TestClient(app_module.app) as client:
+        def import_fleet(path):
+            with app_module.SessionLocal() as db:
+                import_csv_to_db(path, db)
+            # What the import job does once it completes
+            app_module.stats_service.invalidate()
+            app_module.record_change("refresh", reason="import")
+
+        def context(paged):
+            with app_module.SessionLocal() as db:
+                app_module.build_dashboard_context(None, db, paged=paged)
+
+        def fragment(paged, cold=True):
+            if cold:
+                app_module.fragment_cache.invalidate()
+            response = client.get("/fragment", params={"paged": int(paged)})
+            response.raise_for_status()
+
+        def export_csv():
+            with client.stream("GET", "/export", params={"format": "csv"}) as response:
+                response.raise_for_status()
+                for _ in response.iter_bytes():
+                    pass
+
+        def stats():
+            app_module.stats_service.invalidate()
+            with app_module.SessionLocal() as db:
+                app_module.compute_stats(db)
+
+        for size in sizes:
+            path = os.path.join(workdir, f"fleet_{size}.csv")
+            print(f"\n== {size} workstations ==")
+            started = time.perf_counter()
+            generate_fleet(path, size, max(1, size // args.clients_per), args.skew, args.seed)
+            print(f"generated in {time.perf_counter() - started:.1f}s")
+
+            measured = {}
+            # Later cases need the data, so the import always runs at least once
+            measured["import"] = timed(lambda: import_fleet(path), args.repeat if "import" in cases else 1)
+            with app_module.SessionLocal() as db:
+                ids = [row.id for row in db.query(Workstation.id)]
+            if "context" in cases:
+                measured["context"] = timed(lambda: context(False), args.repeat)
+            if "context_paged" in cases:
+                measured["context_paged"] = timed(lambda: context(True), args.repeat)
+            if "fragment" in cases:
+                measured["fragment"] = timed(lambda: fragment(False), args.repeat)
+            if "fragment_paged" in cases:
+                measured["fragment_paged"] = timed(lambda: fragment(True), args.repeat)
+            if "fragment_cached" in cases:
+                fragment(True)
+                measured["fragment_cached"] = timed(lambda: fragment(True, cold=False), max(args.repeat, 10))
+            if "export_csv" in cases:
+                measured["export_csv"] = timed(export_csv, args.repeat)
+            if "update" in cases:
+                measured["update"] = timed(lambda: client.post("/update", data={
+                    "id": rng.choice(ids), "field": "status", "value": rng.choice(STATUSES),
+                }).raise_for_status(), args.updates)
+            if "stats" in cases:
+                measured["stats"] = timed(stats, max(args.repeat, 10))
+
+            results["sizes"][str(size)] = {case: summarize(runs) for case, runs in measured.items() if case in cases}
+            for case, summary in results["sizes"][str(size)].items():
+                print(f"  {case:<16} median {summary['median_ms']:>10.1f} ms  (min {summary['min_ms']:.1f}, "
+                      f"max {summary['max_ms']:.1f}, {summary['runs']} runs)")
+
+    for path in outputs:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nResults written to {path}")
+
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    print(f"\nCompared with {args.baseline} (commit {baseline.get('environment', {}).get('commit')}, "
+          f"tolerance {args.tolerance:.0%}, min delta {args.min_delta_ms:g} ms)")
+    if regressions:
+        print(f"FAIL: {len(regressions)} regressions")
+        for size, case, old, new in regressions:
+            print(f"  {size:>8} {case:<16} {old:10.1f} ms -> {new:10.1f} ms  (+{(new / old - 1):.0%})")
+        return 1
+    print("OK: no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
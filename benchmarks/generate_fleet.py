@@ -0,0 +1,108 @@
+"""
+Synthetic fleet generator.
+
+Writes a CSV in sample.csv's 20-column format with any number of
+workstations and clients. Client sizes follow a Zipf-like distribution
+(--skew): a few large clients and a long tail of small ones, each with at
+least one machine. Hardware, OS and check results are copied as whole rows
+from sample.csv, so combinations stay realistic (an old CPU still fails the
+CPU check). Names, locations, users, free disk space and dates are generated.
+
+    python benchmarks/generate_fleet.py fleet.csv --workstations 100000
+    python benchmarks/generate_fleet.py fleet.csv --workstations 1000000 --clients 5000 --skew 1.2 --seed 7
+
+Clients are named "Company 0" ... "Company N-1", largest first, which are
+the companies benchmarks/mock_connectwise.py serves.
+"""
+
+import argparse
+import csv
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_CSV = os.path.join(ROOT, "sample.csv")
+# Columns generated per machine; everything else comes from a sample.csv row
+GENERATED = {"Client Name", "Location Name", "Computer Name", "Last User",
+             "DiskSpaceRemaining_GB", "Script Last Ran", "Last Contact"}
+LOCATIONS = ["Main Office", "Warehouse", "Branch Office", "Remote", "Front Desk", "Lab"]
+KINDS = ["WS", "LT", "PC"]
+
+
+def load_profiles(sample_path=SAMPLE_CSV):
+    """(header, rows) of sample.csv."""
+    with open(sample_path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        header = next(reader)
+        return header, [row for row in reader if row]
+
+
+def client_sizes(workstations, clients, skew, rng):
+    """Machines per client: one each, the rest spread with Zipf weights rank**-skew."""
+    clients = max(1, min(clients, workstations))
+    weights = 1.0 / np.arange(1, clients + 1) ** skew
+    extra = rng.multinomial(workstations - clients, weights / weights.sum())
+    return extra + 1
+
+
+def format_timestamp(value):
+    # sample.csv's "1/21/2025 18:06" (no zero padding)
+    return f"{value.month}/{value.day}/{value.year} {value.hour}:{value.minute:02d}"
+
+
+def generate_fleet(path, workstations, clients=None, skew=1.1, seed=None, sample_path=SAMPLE_CSV):
+    """Write the CSV; returns the number of machines per client."""
+    rng = np.random.default_rng(seed)
+    header, profiles = load_profiles(sample_path)
+    columns = {name: i for i, name in enumerate(header)}
+    sizes = client_sizes(workstations, clients or max(1, workstations // 50), skew, rng)
+    now = datetime(2025, 6, 1)
+
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        for client, size in enumerate(sizes):
+            # Bigger clients have more sites; most machines sit at the first
+            sites = LOCATIONS[:min(len(LOCATIONS), 1 + int(size) // 100)]
+            site_weights = 1.0 / np.arange(1, len(sites) + 1) ** 2
+            site_picks = rng.choice(len(sites), size=size, p=site_weights / site_weights.sum())
+            profile_picks = rng.integers(len(profiles), size=size)
+            kinds = rng.integers(len(KINDS), size=size)
+            users = rng.integers(max(2, int(size) * 2), size=size)
+            script_age = rng.integers(0, 730 * 24 * 60, size=size)
+            contact_age = rng.exponential(3 * 24 * 60, size=size).astype(int)
+            disk_scale = rng.uniform(0.2, 1.2, size=size)
+            for n in range(size):
+                row = list(profiles[profile_picks[n]])
+                disk = row[columns["DiskSpaceRemaining_GB"]]
+                row[columns["Client Name"]] = f"Company {client}"
+                row[columns["Location Name"]] = sites[site_picks[n]]
+                row[columns["Computer Name"]] = f"C{client:05d}-{KINDS[kinds[n]]}{n:05d}"
+                row[columns["Last User"]] = f"user{users[n]}"
+                row[columns["DiskSpaceRemaining_GB"]] = str(int(float(disk) * disk_scale[n])) if disk else ""
+                row[columns["Script Last Ran"]] = format_timestamp(now - timedelta(minutes=int(script_age[n])))
+                row[columns["Last Contact"]] = format_timestamp(now - timedelta(minutes=int(contact_age[n])))
+                writer.writerow(row)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--workstations", type=int, default=10000, help="machines to generate (default: %(default)s)")
+    parser.add_argument("--clients", type=int, default=None, help="distinct clients (default: one per 50 machines)")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for client sizes, 0 = even (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, for repeatable files")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sizes = generate_fleet(args.path, args.workstations, args.clients, args.skew, args.seed)
+    print(f"Wrote {sizes.sum()} workstations for {len(sizes)} clients to {args.path} "
+          f"in {time.perf_counter() - started:.1f}s (largest client {sizes.max()}, median {int(np.median(sizes))})")
+
+
+if __name__ == "__main__":
+    main()
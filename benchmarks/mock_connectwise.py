@@ -0,0 +1,218 @@
+"""
+Local ConnectWise stand-in.
+
+A small ASGI app serving the parts of the ConnectWise REST API that
+connectwise_api.py calls: /company/companies, /system/members,
+/service/teams, /service/tickets and /schedule/entries. Every response is
+delayed by --latency-ms (plus up to --jitter-ms), a --error-rate fraction
+of requests fail with HTTP 500, and a --throttle-rate fraction (or anything
+over --rate-limit requests per second) gets a 429 with Retry-After.
+GET /_mock/stats returns the request counters, POST /_mock/reset clears
+them.
+
+    python benchmarks/mock_connectwise.py --port 8100 --companies 5000 --latency-ms 80
+    CW_BASE_URL=http://127.0.0.1:8100 uvicorn main:app
+
+Companies are named "Company 0" ... "Company N-1" (the names
+benchmarks/ws_latency.py generates), members "Tech 0" ... "Tech N-1" with
+identifiers tech.0 ... tech.N-1.
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CONDITION = re.compile(r'(\w+)\s*=\s*"([^"]*)"')
+UPDATED_SINCE = re.compile(r"lastUpdated\s*>\s*\[([^\]]+)\]")
+
+
+class MockConnectWise:
+    """Dataset, fault injection and counters behind the mock API; `app` is the ASGI app."""
+
+    def __init__(self, companies=1000, members=50, teams=5, latency=0.05, jitter=0.0,
+                 error_rate=0.0, throttle_rate=0.0, rate_limit=0.0, retry_after=1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        updated = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.companies = [
+            {"id": i + 1, "name": f"Company {i}", "identifier": f"Company{i}", "deletedFlag": False,
+             "_info": {"lastUpdated": (updated + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ")}}
+            for i in range(companies)
+        ]
+        self.members = [
+            {"id": i + 1, "identifier": f"tech.{i}", "firstName": "Tech", "lastName": str(i), "inactiveFlag": False}
+            for i in range(members)
+        ]
+        self.teams = [{"id": i + 1, "name": "Service Team" if i == 0 else f"Team {i}"} for i in range(teams)]
+        self.company_ids = {c["id"] for c in self.companies}
+        self.tickets = {}
+        self.schedule_entries = 0
+        self.reset()
+        self.app = self._build_app()
+
+    def reset(self):
+        self.requests = Counter()
+        self.statuses = Counter()
+        self._window = (0, 0)
+
+    def stats(self):
+        return {
+            "requests": sum(self.requests.values()),
+            "by_endpoint": dict(sorted(self.requests.items())),
+            "by_status": {str(k): v for k, v in sorted(self.statuses.items())},
+            "tickets": len(self.tickets),
+            "schedule_entries": self.schedule_entries,
+        }
+
+    # --- fault injection ---
+
+    def _over_rate_limit(self):
+        """Fixed one-second window, like ConnectWise's per-second API limit."""
+        if not self.rate_limit:
+            return False
+        second = int(time.monotonic())
+        window, count = self._window
+        count = count + 1 if window == second else 1
+        self._window = (second, count)
+        return count > self.rate_limit
+
+    def _fault(self):
+        if self._over_rate_limit() or self.random.random() < self.throttle_rate:
+            return JSONResponse({"code": "TooManyRequests", "message": "Rate limit exceeded"},
+                                status_code=429, headers={"Retry-After": str(self.retry_after)})
+        if self.random.random() < self.error_rate:
+            return JSONResponse({"code": "InternalError", "message": "Injected failure"}, status_code=500)
+        return None
+
+    # --- query helpers ---
+
+    @staticmethod
+    def _page(items, request):
+        page = int(request.query_params.get("page", 1))
+        size = int(request.query_params.get("pageSize", 25))
+        return items[(page - 1) * size:page * size]
+
+    @staticmethod
+    def _filter(items, request):
+        conditions = request.query_params.get("conditions")
+        if not conditions:
+            return items
+        since = UPDATED_SINCE.search(conditions)
+        if since:
+            return [i for i in items if i["_info"]["lastUpdated"] > since.group(1)]
+        # name="X", identifier="x" and firstName="X" OR lastName="X"
+        terms = CONDITION.findall(conditions)
+        return [i for i in items if any(str(i.get(field, "")).lower() == value.lower() for field, value in terms)]
+
+    def _build_app(self):
+        app = FastAPI(title="Mock ConnectWise")
+
+        @app.middleware("http")
+        async def simulate(request: Request, call_next):
+            if request.url.path.startswith("/_mock"):
+                return await call_next(request)
+            route = re.sub(r"/\d+", "/{id}", request.url.path)
+            self.requests[f"{request.method} {route}"] += 1
+            await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+            response = self._fault() or await call_next(request)
+            self.statuses[response.status_code] += 1
+            return response
+
+        @app.get("/company/companies")
+        async def companies(request: Request):
+            return self._page(self._filter(self.companies, request), request)
+
+        @app.get("/system/members")
+        async def members(request: Request):
+            return self._page(self._filter(self.members, request), request)
+
+        @app.get("/service/teams")
+        async def teams(request: Request):
+            return self._page(self._filter(self.teams, request), request)
+
+        @app.post("/service/tickets")
+        async def create_ticket(request: Request):
+            ticket = await request.json()
+            company_id = (ticket.get("company") or {}).get("id")
+            if company_id not in self.company_ids:
+                return JSONResponse({"code": "InvalidObject", "message": "Company not found",
+                                     "errors": [{"message": f"company id {company_id} does not exist"}]},
+                                    status_code=400)
+            ticket["id"] = len(self.tickets) + 1
+            self.tickets[ticket["id"]] = ticket
+            return JSONResponse(ticket, status_code=201)
+
+        @app.patch("/service/tickets/{ticket_id}")
+        async def patch_ticket(ticket_id: int):
+            if ticket_id not in self.tickets:
+                return JSONResponse({"code": "NotFound", "message": "Ticket not found"}, status_code=404)
+            return self.tickets[ticket_id]
+
+        @app.post("/schedule/entries")
+        async def schedule_entry(request: Request):
+            entry = await request.json()
+            if entry.get("objectId") not in self.tickets:
+                return JSONResponse({"code": "InvalidObject", "message": "Ticket not found"}, status_code=400)
+            self.schedule_entries += 1
+            entry["id"] = self.schedule_entries
+            return JSONResponse(entry, status_code=201)
+
+        @app.get("/_mock/stats")
+        async def mock_stats():
+            return self.stats()
+
+        @app.post("/_mock/reset")
+        async def mock_reset():
+            self.reset()
+            return {"ok": True}
+
+        return app
+
+
+def add_arguments(parser):
+    """Mock dataset and fault options, shared with benchmarks/cw_latency.py."""
+    parser.add_argument("--companies", type=int, default=1000, help="companies in the mock (default: %(default)s)")
+    parser.add_argument("--members", type=int, default=50, help="members (technicians) in the mock (default: %(default)s)")
+    parser.add_argument("--latency-ms", type=float, default=50, help="delay added to every response (default: %(default)s)")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="extra random delay, up to this (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500 (default: %(default)s)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429 (default: %(default)s)")
+    parser.add_argument("--rate-limit", type=float, default=0, help="429 above this many requests/second, 0 = off (default: %(default)s)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429 (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for latency and faults")
+
+
+def from_arguments(args):
+    return MockConnectWise(
+        companies=args.companies, members=args.members,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit, retry_after=args.retry_after, seed=args.seed,
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(from_arguments(args).app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
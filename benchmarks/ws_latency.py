@@ -0,0 +1,150 @@
+"""
+Event-loop responsiveness under load.
+
+Runs the app in-process against a scratch database and sends a WebSocket
+"ping" every --interval seconds while other threads keep it busy with a
+large CSV import, uncached dashboard renders, exports and bursts of inline
+/update edits. Every round trip goes through the event loop, so blocking DB
+calls on it show up directly as ping latency.
+
+    python benchmarks/ws_latency.py
+    python benchmarks/ws_latency.py --rows 100000 --seconds 20 --max-p99-ms 50
+
+Exits with status 1 when the p99 round trip exceeds --max-p99-ms.
+"""
+
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADER = ["Client Name", "Computer Name", "RAM_GB", "Processor Name", "DiskSpaceRemaining_GB"]
+PROCESSORS = ["Intel(R) Core(TM) i5-7500 CPU @ 3.40GHz", "Intel(R) Core(TM) i7-8700 CPU @ 3.20GHz", "AMD Ryzen 5 3600"]
+
+
+def write_fleet_csv(path, rows, clients):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            writer.writerow([
+                f"Company {i % clients}",
+                f"PC-{i:06d}",
+                random.choice(["4", "8", "16", "32"]),
+                random.choice(PROCESSORS),
+                str(random.randint(10, 900)),
+            ])
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000, help="workstations in the generated import (default: %(default)s)")
+    parser.add_argument("--clients", type=int, default=500, help="distinct clients (default: %(default)s)")
+    parser.add_argument("--seconds", type=float, default=10, help="how long to measure (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between pings (default: %(default)s)")
+    parser.add_argument("--max-p99-ms", type=float, default=100, help="fail above this p99 round trip (default: %(default)s)")
+    args = parser.parse_args()
+
+    # The app uses ./database.db, ./templates and ./static; run it in a scratch dir
+    workdir = tempfile.mkdtemp(prefix="ws_latency_")
+    for name in ("templates", "static"):
+        os.symlink(os.path.join(ROOT, name), os.path.join(workdir, name))
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("WS_COALESCE_MS", "0")
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    csv_path = os.path.join(workdir, "fleet.csv")
+    print(f"Generating {args.rows} rows across {args.clients} clients...")
+    write_fleet_csv(csv_path, args.rows, args.clients)
+
+    stop = threading.Event()
+    counts = {"imports": 0, "renders": 0, "exports": 0, "updates": 0, "errors": 0}
+
+    # Requests that fail under load (e.g. "database is locked") are counted, not raised
+    with TestClient(app_module.app, raise_server_exceptions=False) as client:
+        def upload(mode):
+            with open(csv_path, "rb") as fh:
+                job = client.post(
+                    "/import", files={"file": ("fleet.csv", fh)}, data={"mode": mode},
+                    headers={"accept": "application/json"},
+                ).json()["job"]
+            while client.get(f"/import/jobs/{job['id']}").json()["status"] in ("queued", "running"):
+                time.sleep(0.05)
+
+        print("Loading the initial import...")
+        upload("replace")
+
+        def importer():
+            while not stop.is_set():
+                upload(random.choice(["merge", "replace"]))
+                counts["imports"] += 1
+
+        def renderer():
+            while not stop.is_set():
+                # A different search each time, so every render misses the cache
+                client.get("/fragment", params={"search": f"PC-{random.randint(0, args.rows):06d}"})
+                client.get("/fragment", params={"paged": "1", "ram": random.choice(["8", "16"])})
+                counts["renders"] += 2
+
+        def exporter():
+            while not stop.is_set():
+                client.get("/export", params={"ram": random.choice(["4", "32"]), "format": "csv"})
+                counts["exports"] += 1
+
+        def updater():
+            while not stop.is_set():
+                for _ in range(20):
+                    response = client.post("/update", data={
+                        "id": random.randint(1, args.rows // 2), "field": "notes", "value": str(time.time()),
+                    })
+                    counts["updates" if response.status_code == 200 else "errors"] += 1
+                time.sleep(0.1)
+
+        threads = [threading.Thread(target=fn, daemon=True) for fn in (importer, renderer, exporter, updater)]
+        for thread in threads:
+            thread.start()
+
+        rtts = []
+        with client.websocket_connect("/ws") as ws:
+            deadline = time.monotonic() + args.seconds
+            while time.monotonic() < deadline:
+                sent = time.perf_counter()
+                ws.send_text("ping")
+                while ws.receive_json().get("action") != "pong":
+                    pass
+                rtts.append((time.perf_counter() - sent) * 1000)
+                time.sleep(args.interval)
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=60)
+
+    p99 = percentile(rtts, 99)
+    print(f"\n{len(rtts)} pings under load ({', '.join(f'{v} {k}' for k, v in counts.items())})")
+    print(f"  p50 {statistics.median(rtts):7.2f} ms")
+    print(f"  p95 {percentile(rtts, 95):7.2f} ms")
+    print(f"  p99 {p99:7.2f} ms")
+    print(f"  max {max(rtts):7.2f} ms")
+    if p99 > args.max_p99_ms:
+        print(f"FAIL: p99 above {args.max_p99_ms} ms")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+import asyncio
+import itertools
+import json
+import time
+from fastapi import WebSocket
+from metrics import WS_BROADCAST_RECIPIENTS, WS_BROADCAST_SECONDS, WS_SEND_SECONDS
+
+SLOW_CONSUMER_POLICIES = ("disconnect", "drop")
+
+
+def coalesce_key(message):
+    """
+    Messages with the same key supersede each other inside a coalescing
+    window: only the newest is sent. Row messages carry the full row, so any
+    of them replaces an earlier one for the same workstation.
+    """
+    action = message.get("action")
+    if action == "field_update":
+        return ("field", message["id"], message["field"])
+    if action in ("row_added", "row_updated", "row_removed"):
+        return ("row", message["row"]["id"])
+    if action == "import_job":
+        return ("import_job", message["id"])
+    return None
+
+
+class Connection:
+    """One WebSocket with its outgoing queue and delivery counters."""
+
+    def __init__(self, websocket: WebSocket, max_queue):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(max_queue)
+        self.task = None
+        self.connected_at = time.time()
+        self.sent = 0
+        self.dropped = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def record_send(self, latency):
+        self.sent += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def to_dict(self):
+        client = self.websocket.client
+        return {
+            "client": f"{client.host}:{client.port}" if client else None,
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "queue_depth": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            # Enqueue to send complete, in milliseconds
+            "last_latency_ms": round(self.last_latency * 1000, 2),
+            "avg_latency_ms": round(self.total_latency / self.sent * 1000, 2) if self.sent else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+        }
+
+
+class ConnectionManager:
+    """
+    Fans messages out to every dashboard WebSocket without letting one slow
+    client hold up the others.
+
+    Each connection has a bounded queue drained by its own writer task, so a
+    broadcast only serializes the message once and enqueues it. When a
+    queue is full the slow consumer is disconnected (it reconnects and
+    catches up through /changes) or, with the "drop" policy, loses its
+    oldest queued message. With `coalesce_seconds` > 0, messages are held
+    for that long and superseded updates to the same row, field or import
+    job are collapsed into one "batch" message.
+    """
+
+    def __init__(self, max_queue=256, send_timeout=5.0, slow_policy="disconnect", coalesce_seconds=0.0):
+        if slow_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {slow_policy}")
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.slow_policy = slow_policy
+        self.coalesce_seconds = coalesce_seconds
+        self.connections = {}
+        self.disconnected_slow = 0
+        self.coalesced = 0
+        self._pending = {}
+        self._pending_from_seq = None
+        self._flush_handle = None
+        self._unique = itertools.count()
+
+    @property
+    def active_connections(self):
+        return set(self.connections)
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        conn = Connection(websocket, self.max_queue)
+        conn.task = asyncio.create_task(self._writer(conn))
+        self.connections[websocket] = conn
+
+    def disconnect(self, websocket: WebSocket):
+        conn = self.connections.pop(websocket, None)
+        if conn and conn.task and conn.task is not asyncio.current_task():
+            conn.task.cancel()
+
+    async def broadcast(self, message: dict):
+        if self.coalesce_seconds <= 0:
+            self._deliver(message)
+            return
+        self._hold(message)
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.coalesce_seconds, self._flush)
+
+    def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one connection only."""
+        conn = self.connections.get(websocket)
+        if conn is None:
+            return
+        item = (time.perf_counter(), json.dumps(message))
+        try:
+            conn.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._slow_consumer(conn, item)
+
+    def stats(self):
+        return {
+            "connections": len(self.connections),
+            "max_queue": self.max_queue,
+            "slow_policy": self.slow_policy,
+            "coalesce_ms": round(self.coalesce_seconds * 1000),
+            "disconnected_slow": self.disconnected_slow,
+            "coalesced": self.coalesced,
+            "clients": [conn.to_dict() for conn in self.connections.values()],
+        }
+
+    async def shutdown(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush()
+        for websocket in list(self.connections):
+            self.disconnect(websocket)
+
+    def _hold(self, message):
+        seq = message.get("seq")
+        if seq is not None and self._pending_from_seq is None:
+            self._pending_from_seq = seq
+        if message.get("action") == "refresh":
+            # A full reload makes every held data change moot
+            for key in [k for k, m in self._pending.items() if m.get("seq") is not None]:
+                del self._pending[key]
+                self.coalesced += 1
+        key = coalesce_key(message) or ("unique", next(self._unique))
+        if self._pending.pop(key, None) is not None:
+            self.coalesced += 1
+        self._pending[key] = message
+
+    def _flush(self):
+        self._flush_handle = None
+        messages = sorted(self._pending.values(), key=lambda m: m.get("seq") or 0)
+        from_seq = self._pending_from_seq
+        self._pending = {}
+        self._pending_from_seq = None
+        if not messages:
+            return
+        seqs = [m["seq"] for m in messages if m.get("seq") is not None]
+        if len(messages) == 1 and (not seqs or seqs[0] == from_seq):
+            self._deliver(messages[0])
+            return
+        # Only the newest stats are worth sending
+        with_stats = [i for i, m in enumerate(messages) if "stats" in m]
+        for i in with_stats[:-1]:
+            messages[i] = {k: v for k, v in messages[i].items() if k != "stats"}
+        batch = {"action": "batch", "changes": messages}
+        if seqs:
+            batch.update(from_seq=from_seq, seq=max(seqs))
+        self._deliver(batch)
+
+    def _deliver(self, message):
+        started = time.perf_counter()
+        data = json.dumps(message)
+        enqueued = time.perf_counter()
+        connections = list(self.connections.values())
+        for conn in connections:
+            try:
+                conn.queue.put_nowait((enqueued, data))
+            except asyncio.QueueFull:
+                self._slow_consumer(conn, (enqueued, data))
+        WS_BROADCAST_SECONDS.observe(time.perf_counter() - started)
+        WS_BROADCAST_RECIPIENTS.observe(len(connections))
+
+    def _slow_consumer(self, conn, item):
+        if self.slow_policy == "drop":
+            conn.queue.get_nowait()
+            conn.queue.put_nowait(item)
+            conn.dropped += 1
+            return
+        print(f"[WS] Disconnecting slow client ({conn.queue.qsize()} messages queued)")
+        self.disconnected_slow += 1
+        self.disconnect(conn.websocket)
+        asyncio.create_task(self._close(conn.websocket))
+
+    async def _close(self, websocket, code=1013):
+        try:
+            # 1013: try again later; the page reconnects and catches up
+            await asyncio.wait_for(websocket.close(code=code), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _writer(self, conn):
+        try:
+            while True:
+                enqueued, data = await conn.queue.get()
+                await asyncio.wait_for(conn.websocket.send_text(data), self.send_timeout)
+                latency = time.perf_counter() - enqueued
+                conn.record_send(latency)
+                WS_SEND_SECONDS.observe(latency)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Send failed or timed out: the client is gone or stuck. Close the
+            # socket too, or a stuck page keeps it open and never catches up.
+            print(f"[WS] Closing connection after failed send: {type(e).__name__}: {e}")
+            self.disconnect(conn.websocket)
+            await self._close(conn.websocket, code=1011)
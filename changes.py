@@ -0,0 +1,50 @@
+import threading
+import uuid
+from collections import deque
+
+
+class ChangeLog:
+    """
+    Recent data changes, each stamped with a monotonically increasing
+    sequence number.
+
+    Every change is also the WebSocket message broadcast for it, so a client
+    that knows the last seq it applied can replay exactly what it missed
+    through `since`. Only the last `retain` changes are kept in memory; the
+    epoch changes on every restart so clients can tell a restarted server's
+    sequence numbers apart from the old ones.
+    """
+
+    def __init__(self, retain=1000):
+        self.epoch = uuid.uuid4().hex[:12]
+        self._changes = deque(maxlen=retain)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def record(self, action, **data):
+        """Append a change and return it as a message dict (safe from any thread)."""
+        with self._lock:
+            self._seq += 1
+            change = {"action": action, "seq": self._seq, **data}
+            self._changes.append(change)
+            return change
+
+    def since(self, seq, epoch=None):
+        """
+        Changes after `seq` as (changes, complete).
+
+        `complete` is False when the caller has to reload instead of
+        replaying: the changes it needs were already dropped, or its seq
+        comes from another epoch.
+        """
+        with self._lock:
+            if (epoch and epoch != self.epoch) or seq > self._seq:
+                return [], False
+            oldest = self._changes[0]["seq"] if self._changes else self._seq + 1
+            if seq < oldest - 1:
+                return [], False
+            return [c for c in self._changes if c["seq"] > seq], True
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+import numpy as np
+from fuzzywuzzy import fuzz
+
+LEGAL_SUFFIXES = {"inc", "incorporated", "llc", "pllc", "ltd", "limited", "co", "corp", "corporation", "company", "plc", "lp", "llp"}
+COMPANY_FIELDS = "id,name,identifier,deletedFlag,_info/lastUpdated"
+
+
+def normalize_company_name(name):
+    """
+    Key for exact matching: case-folded, "&" as "and", punctuation dropped and
+    trailing legal suffixes removed, so "ACME, Inc." and "Acme Inc" match.
+    """
+    words = re.sub(r"[^\w\s]", " ", (name or "").casefold().replace("&", " and ")).split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def exact_name(name):
+    """Key for the exact-name lookup: case-folded, whitespace collapsed."""
+    return " ".join((name or "").casefold().split())
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_index(companies):
+    """
+    (companies by exact name, companies by normalized key, keys, trigram
+    posting arrays, trigrams per key) for CompanyDirectory.
+    """
+    by_name = {}
+    by_key = {}
+    keys = []
+    postings = {}
+    gram_counts = []
+    for company in sorted(companies.values(), key=lambda c: c["id"]):
+        by_name.setdefault(exact_name(company.get("name")), []).append(company)
+        key = normalize_company_name(company.get("name"))
+        if key not in by_key:
+            by_key[key] = []
+            grams = trigrams(key)
+            for gram in grams:
+                postings.setdefault(gram, []).append(len(keys))
+            gram_counts.append(len(grams))
+            keys.append(key)
+        by_key[key].append(company)
+    postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+    return by_name, by_key, keys, postings, np.array(gram_counts, dtype=np.int32)
+
+
+class CompanyDirectory:
+    """
+    Local copy of every ConnectWise company with an index for resolving
+    client names without calling the API.
+
+    The first load pages through all companies (`page_size` per request, so
+    nothing is truncated). After `ttl` seconds the next lookup fetches only
+    companies whose lastUpdated is newer than the newest one already held,
+    and every `full_refresh_seconds` the whole directory is reloaded to drop
+    deleted companies. With `cache_path` the directory is saved to disk and
+    reused after a restart.
+
+    Lookups try the exact (case-folded) name first, then the normalized
+    name, but only when it belongs to a single company: "Acme Inc" and
+    "Acme LLC" share a normalized name and are told apart by fuzz.ratio on
+    the full names. Otherwise the trigram index scores every name at once
+    (Dice coefficient, numpy bincount over the posting lists) and only the
+    best `candidates` are ranked with fuzz.ratio. Results are memoized
+    until the directory changes.
+    """
+
+    def __init__(self, client, ttl=900, full_refresh_seconds=86400, page_size=1000,
+                 cache_path=None, candidates=10, memo_size=4096):
+        self.client = client
+        self.ttl = ttl
+        self.full_refresh_seconds = full_refresh_seconds
+        self.page_size = page_size
+        self.cache_path = cache_path
+        self.candidates = candidates
+        self.memo_size = memo_size
+        self.companies = {}
+        self.last_updated = None
+        self.refreshed_at = 0.0
+        self.full_refreshed_at = 0.0
+        self.refreshes = 0
+        self.hits = 0
+        self.misses = 0
+        self._by_name = {}
+        self._by_key = {}
+        self._keys = []
+        self._postings = {}
+        self._gram_counts = np.zeros(0, dtype=np.int32)
+        self._memo = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._load()
+
+    # --- loading ---
+
+    async def ensure_fresh(self):
+        if time.time() - self.refreshed_at < self.ttl:
+            return
+        async with self._lock:
+            # Another caller may have refreshed while we waited
+            if time.time() - self.refreshed_at < self.ttl:
+                return
+            full = not self.companies or time.time() - self.full_refreshed_at >= self.full_refresh_seconds
+            await self.refresh(full=full)
+
+    async def refresh(self, full=False):
+        """Fetch all companies, or only those updated since the last refresh."""
+        started = time.perf_counter()
+        conditions = None
+        if not full and self.last_updated:
+            conditions = f"lastUpdated > [{self.last_updated}]"
+        fetched = await self._fetch_all(conditions)
+        companies = {} if full else dict(self.companies)
+        for company in fetched:
+            if company.get("deletedFlag"):
+                companies.pop(company["id"], None)
+            else:
+                companies[company["id"]] = company
+        now = time.time()
+        self.refreshed_at = now
+        if full:
+            self.full_refreshed_at = now
+        self.refreshes += 1
+        if full or fetched:
+            # Building the index for 10k+ names takes a while; keep it off the event loop
+            self._set_index(companies, await asyncio.to_thread(build_index, companies))
+            await asyncio.to_thread(self._save)
+        print(f"[CW] Company directory {'loaded' if full else 'refreshed'}: {len(fetched)} fetched, "
+              f"{len(self.companies)} companies in {time.perf_counter() - started:.2f}s")
+
+    async def warm_up(self):
+        """Load the directory in the background at startup; lookups retry later on failure."""
+        try:
+            await self.ensure_fresh()
+        except Exception as e:
+            print(f"[CW] Company directory warm-up failed: {e}")
+
+    async def _fetch_all(self, conditions=None):
+        companies = []
+        page = 1
+        while True:
+            params = {"page": page, "pageSize": self.page_size, "orderBy": "id asc", "fields": COMPANY_FIELDS}
+            if conditions:
+                params["conditions"] = conditions
+            response = await self.client.get("/company/companies", params=params)
+            response.raise_for_status()
+            batch = response.json()
+            companies.extend(batch)
+            if len(batch) < self.page_size:
+                return companies
+            page += 1
+
+    def add(self, company):
+        """Add one company found some other way (e.g. created since the last refresh)."""
+        if company["id"] in self.companies:
+            return
+        self.companies = {**self.companies, company["id"]: company}
+        self._by_name.setdefault(exact_name(company.get("name")), []).append(company)
+        key = normalize_company_name(company.get("name"))
+        if key in self._by_key:
+            self._by_key[key].append(company)
+        else:
+            index = len(self._keys)
+            grams = trigrams(key)
+            for gram in grams:
+                self._postings[gram] = np.append(self._postings.get(gram, np.zeros(0, dtype=np.int32)), index)
+            self._gram_counts = np.append(self._gram_counts, len(grams))
+            self._keys.append(key)
+            self._by_key[key] = [company]
+        self._memo.clear()
+
+    # --- index ---
+
+    def _set_index(self, companies, index):
+        self.companies = companies
+        self._by_name, self._by_key, self._keys, self._postings, self._gram_counts = index
+        newest = max((c.get("_info") or {}).get("lastUpdated") or "" for c in companies.values()) if companies else ""
+        if newest and (self.last_updated is None or newest > self.last_updated):
+            self.last_updated = newest
+        self._memo.clear()
+
+    def search(self, name, limit=5):
+        """Best matches as [(score, company)], highest first; score is fuzz.ratio 0-100."""
+        exact = self._by_name.get(exact_name(name))
+        if exact:
+            return [(100, company) for company in exact][:limit]
+        key = normalize_company_name(name)
+        if len(self._by_key.get(key, ())) == 1:
+            return [(100, self._by_key[key][0])]
+        grams = trigrams(key)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return []
+        overlap = np.bincount(np.concatenate(lists), minlength=len(self._keys))
+        dice = 2.0 * overlap / (len(grams) + self._gram_counts)
+        n = min(self.candidates, len(dice))
+        best = np.argpartition(-dice, n - 1)[:n]
+        scored = []
+        for index in best:
+            if overlap[index]:
+                scored.extend((self._score(name, key, index, company), company)
+                              for company in self._by_key[self._keys[index]])
+        scored.sort(key=lambda pair: -pair[0])
+        return scored[:limit]
+
+    def _score(self, name, key, index, company):
+        if len(self._by_key[self._keys[index]]) == 1:
+            return fuzz.ratio(key, self._keys[index])
+        # Several companies share this normalized name; only the full names tell them apart
+        return fuzz.ratio(exact_name(name), exact_name(company.get("name")))
+
+    def find(self, name, min_score=81):
+        """Best company for `name` scoring at least `min_score`, or None. Memoized."""
+        memo_key = (name, min_score)
+        if memo_key in self._memo:
+            self._memo.move_to_end(memo_key)
+            self.hits += 1
+            return self._memo[memo_key]
+        self.misses += 1
+        matches = self.search(name, limit=1)
+        company = matches[0][1] if matches and matches[0][0] >= min_score else None
+        self._memo[memo_key] = company
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return company
+
+    def stats(self):
+        return {
+            "companies": len(self.companies),
+            "names": len(self._keys),
+            "last_updated": self.last_updated,
+            "refreshes": self.refreshes,
+            "age_seconds": round(time.time() - self.refreshed_at, 1) if self.refreshed_at else None,
+            "memo_hits": self.hits,
+            "memo_misses": self.misses,
+        }
+
+    # --- persistence ---
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as fh:
+                saved = json.load(fh)
+            companies = {c["id"]: c for c in saved["companies"]}
+            self._set_index(companies, build_index(companies))
+            self.last_updated = saved.get("last_updated") or self.last_updated
+            self.refreshed_at = saved["refreshed_at"]
+            self.full_refreshed_at = saved["full_refreshed_at"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[CW] Ignoring unreadable company cache {self.cache_path}: {e}")
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        saved = {
+            "saved_at": datetime.now(timezone.utc).isoformat(),
+            "last_updated": self.last_updated,
+            "refreshed_at": self.refreshed_at,
+            "full_refreshed_at": self.full_refreshed_at,
+            "companies": list(self.companies.values()),
+        }
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(saved, fh)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,117 @@
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+)
+
+
+def choose_encoding(accept_encoding):
+    """Best supported encoding from an Accept-Encoding header, or None."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    for encoding in (("br",) if brotli else ()) + ("gzip",):
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding, level):
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=level["br"])
+            self.compress = self._c.process
+            self.flush = self._c.flush
+            self.finish = self._c.finish
+        else:
+            # wbits=31: zlib stream with a gzip header and trailer
+            self._c = zlib.compressobj(level["gzip"], zlib.DEFLATED, 31)
+            self.compress = self._c.compress
+            self.flush = lambda: self._c.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._c.flush
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when the brotli package is installed) or gzip response
+    compression for text, JSON and NDJSON bodies.
+
+    Streaming responses are flushed chunk by chunk so CSV exports still
+    arrive incrementally. Bodies smaller than `minimum_size`, responses that
+    already have a Content-Encoding and binary formats (XLSX, Parquet,
+    Arrow) pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size=1000, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                response_start, start = start, None
+                if not self._should_compress(response_start, body, more_body):
+                    await send(response_start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.level)
+                response_headers = [
+                    (k, v) for k, v in response_start["headers"] if k.lower() != b"content-length"
+                ]
+                response_headers.append((b"content-encoding", encoding.encode()))
+                response_headers.append((b"vary", b"Accept-Encoding"))
+                await send({**response_start, "headers": response_headers})
+            if compressor is None:
+                await send(message)
+                return
+            data = compressor.compress(body)
+            data += compressor.flush() if more_body else compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, response_start, body, more_body):
+        if response_start["status"] in (204, 304) or (not more_body and len(body) < self.minimum_size):
+            return False
+        response_headers = {k.lower(): v for k, v in response_start["headers"]}
+        if b"content-encoding" in response_headers:
+            return False
+        content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
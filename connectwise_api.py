@@ -1,11 +1,16 @@
 import os
 import httpx
 import base64
+import importlib.util
+import random
+import time
 from dotenv import load_dotenv
 from typing import Optional, Dict, List, Tuple
 import asyncio
-from fuzzywuzzy import fuzz
 from datetime import datetime
+from company_directory import CompanyDirectory
+from member_directory import MemberDirectory
+from metrics import CW_LATENCY, CW_REQUESTS, api_path
 
 load_dotenv()
 
@@ -27,123 +32,327 @@ HEADERS = {
     "Accept": "application/json"
 }
 
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, in bursts of up to
+    `capacity`. pause() holds every caller back, e.g. for a 429's
+    Retry-After, since the server limit applies to all of our requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.waits = 0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out first come first served
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self.waits += 1
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                self.waits += 1
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        # Refill starts when the pause ends, so it isn't followed by a full burst
+        self._updated = self._paused_until
+
+
+class ConnectWiseClient:
+    """
+    One long-lived, pooled httpx.AsyncClient for every ConnectWise call.
+
+    Connections are kept alive between calls (no new TCP/TLS handshake per
+    request), every request gets the same timeouts, and failures are retried
+    with exponential backoff and full jitter. Idempotent requests (GET, PUT,
+    DELETE) are retried on 5xx responses and network errors; POST and PATCH
+    only when the request never reached the server (connect errors, pool
+    timeouts) or was refused with a 429. Any other failure, a 503 included,
+    may come after ConnectWise already created the ticket, so retrying it
+    could create a second one. A 429 is retried for any method after its
+    Retry-After, during which the shared `limiter` (a TokenBucket, if
+    given) holds back every other request too.
+
+    main.py opens it in the app lifespan; outside the app it opens itself
+    on first use.
+    """
+
+    RETRY_STATUSES = {500, 502, 503, 504}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+    # Errors raised before the request was sent; safe to retry for any method
+    NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+    RETRY_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+    def __init__(
+        self,
+        base_url=BASE_URL,
+        headers=HEADERS,
+        timeout=float(os.getenv("CW_TIMEOUT", "30")),
+        connect_timeout=float(os.getenv("CW_CONNECT_TIMEOUT", "5")),
+        max_connections=int(os.getenv("CW_MAX_CONNECTIONS", "20")),
+        max_retries=int(os.getenv("CW_MAX_RETRIES", "3")),
+        backoff=0.5,
+        max_backoff=8.0,
+        http2=os.getenv("CW_HTTP2", "0") == "1",
+        limiter=None,
+        max_retry_after=60.0,
+    ):
+        self.base_url = base_url or ""
+        self.headers = {k: v for k, v in headers.items() if v is not None}
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=60
+        )
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("[CW] CW_HTTP2=1 but the h2 package is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.limiter = limiter
+        self.max_retry_after = max_retry_after
+        self.rate_limited = 0
+        self._client = None
+
+    async def start(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        client = await self.start()
+        method = method.upper()
+        attempt = 0
+        while True:
+            if self.limiter:
+                await self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+            except self.RETRY_ERRORS as e:
+                self._observe(method, path, started, type(e).__name__)
+                retryable = method in self.IDEMPOTENT_METHODS or isinstance(e, self.NOT_SENT_ERRORS)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                reason, delay = f"{type(e).__name__}: {e}", self._delay(attempt)
+            else:
+                self._observe(method, path, started, response.status_code)
+                if response.status_code == 429:
+                    self.rate_limited += 1
+                retryable = response.status_code == 429 or (
+                    response.status_code in self.RETRY_STATUSES and method in self.IDEMPOTENT_METHODS
+                )
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                reason, delay = f"HTTP {response.status_code}", self._delay(attempt, response)
+                if response.status_code == 429 and self.limiter:
+                    self.limiter.pause(delay)
+                await response.aclose()
+            attempt += 1
+            print(f"[CW] {method} {path} failed ({reason}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", path, **kwargs)
+
+    @staticmethod
+    def _observe(method, path, started, status):
+        CW_REQUESTS.inc(method=method, path=api_path(path), status=status)
+        CW_LATENCY.observe(time.perf_counter() - started, method=method, path=api_path(path))
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_retry_after)
+        # Full jitter: anywhere up to the exponential cap, so clients don't retry in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+RATE_LIMIT = float(os.getenv("CW_RATE_LIMIT", "10"))
+cw_client = ConnectWiseClient(
+    limiter=TokenBucket(RATE_LIMIT, float(os.getenv("CW_RATE_BURST", "0")) or None) if RATE_LIMIT > 0 else None,
+)
+ASSIGN_CONCURRENCY = int(os.getenv("CW_ASSIGN_CONCURRENCY", "4"))
+member_directory = MemberDirectory(cw_client, ttl=int(os.getenv("CW_MEMBER_TTL", "3600")))
+company_directory = CompanyDirectory(
+    cw_client,
+    ttl=int(os.getenv("CW_COMPANY_TTL", "900")),
+    cache_path=os.getenv("CW_COMPANY_CACHE", "cw_companies.json") or None,
+)
+
 async def find_company_by_name(company_name: str) -> Optional[Dict]:
     """Find a company by name, with fuzzy matching fallback."""
-    async with httpx.AsyncClient() as client:
-        # First try exact match
-        response = await client.get(
-            f"{BASE_URL}/company/companies",
-            headers=HEADERS,
-            params={"conditions": f'name="{company_name}"'}
-        )
-        if response.status_code == 200:
-            companies = response.json()
-            if companies:
-                return companies[0]
-        # If no exact match, get all companies and do fuzzy matching
-        response = await client.get(
-            f"{BASE_URL}/company/companies",
-            headers=HEADERS,
-            params={"pageSize": 1000}  # Adjust if you have more companies
-        )
-        if response.status_code == 200:
-            all_companies = response.json()
-            best_match = None
-            best_score = 0
-            for company in all_companies:
-                score = fuzz.ratio(company_name.lower(), company['name'].lower())
-                if score > best_score and score > 80:  # 80% similarity threshold
-                    best_score = score
-                    best_match = company
-            return best_match
+    # Resolve from the local directory (exact normalized name, then fuzzy)
+    try:
+        await company_directory.ensure_fresh()
+    except httpx.HTTPError as e:
+        print(f"[CW] Company directory refresh failed, using the cached copy: {e}")
+    company = company_directory.find(company_name)
+    if company:
+        return company
+    # Not in the directory: it may have been created since the last refresh
+    response = await cw_client.get(
+        "/company/companies",
+        params={"conditions": f'name="{company_name}"'}
+    )
+    if response.status_code == 200:
+        companies = response.json()
+        if companies:
+            company_directory.add(companies[0])
+            return companies[0]
     return None
 
 async def find_member_by_name(technician_name: str) -> Optional[Dict]:
     """Find a ConnectWise member (resource) by name."""
-    async with httpx.AsyncClient() as client:
-        # Try to find member by identifier (usually firstname.lastname format)
-        identifier = technician_name.lower().replace(" ", ".")
-        response = await client.get(
-            f"{BASE_URL}/system/members",
-            headers=HEADERS,
-            params={"conditions": f'identifier="{identifier}"'}
-        )
-        if response.status_code == 200:
-            members = response.json()
-            if members:
-                return members[0]
-        # If not found by identifier, search by name
-        response = await client.get(
-            f"{BASE_URL}/system/members",
-            headers=HEADERS,
-            params={"conditions": f'firstName="{technician_name}" OR lastName="{technician_name}"'}
-        )
-        if response.status_code == 200:
-            members = response.json()
-            if members:
-                return members[0]
+    try:
+        await member_directory.ensure_fresh()
+    except httpx.HTTPError as e:
+        print(f"[CW] Member directory refresh failed, using the cached copy: {e}")
+    member = member_directory.find(technician_name)
+    if member or member_directory.known_missing(technician_name):
+        return member
+    # Not in the directory: ask the API directly
+    member = await _query_member_by_name(technician_name)
+    if member:
+        member_directory.add(member)
+    else:
+        member_directory.mark_missing(technician_name)
+    return member
+
+async def _query_member_by_name(technician_name: str) -> Optional[Dict]:
+    # Try to find member by identifier (usually firstname.lastname format)
+    identifier = technician_name.lower().replace(" ", ".")
+    response = await cw_client.get(
+        "/system/members",
+        params={"conditions": f'identifier="{identifier}"'}
+    )
+    if response.status_code == 200:
+        members = response.json()
+        if members:
+            return members[0]
+    # If not found by identifier, search by name
+    response = await cw_client.get(
+        "/system/members",
+        params={"conditions": f'firstName="{technician_name}" OR lastName="{technician_name}"'}
+    )
+    if response.status_code == 200:
+        members = response.json()
+        if members:
+            return members[0]
     return None
 
 async def find_team_by_name(team_name: str) -> Optional[Dict]:
     """Find a ConnectWise team by name."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{BASE_URL}/service/teams",
-            headers=HEADERS,
-            params={"conditions": f'name="{team_name}"'}
-        )
-        if response.status_code == 200:
-            teams = response.json()
-            if teams:
-                return teams[0]
+    response = await cw_client.get(
+        "/service/teams",
+        params={"conditions": f'name="{team_name}"'}
+    )
+    if response.status_code == 200:
+        teams = response.json()
+        if teams:
+            return teams[0]
     return None
 
 async def assign_technician_to_ticket(ticket_id: int, member_id: int, member_name: str) -> bool:
     """Assign a technician to a ticket via schedule entry."""
-    async with httpx.AsyncClient() as client:
+    try:
+        # Method 1: Try using the schedule API
+        schedule_data = {
+            "objectId": ticket_id,
+            "type": {"identifier": "S"},  # S for Service ticket
+            "member": {"id": member_id},
+            "workRole": {"name": "Technician"},
+            "dateStart": datetime.utcnow().isoformat() + "Z",
+            "timeZone": {"name": "GMT-8/Pacific Time: US & Canada (UTC-07)"}
+        }
+        response = await cw_client.post(
+            "/schedule/entries",
+            json=schedule_data
+        )
+        if response.status_code == 201:
+            return True
+        # Method 2: Try using the ticket update endpoint
+        update_data = [{
+            "op": "add",
+            "path": "/resources",
+            "value": member_name
+        }]
+        patch_response = await cw_client.patch(
+            f"/service/tickets/{ticket_id}",
+            json=update_data
+        )
+        return patch_response.status_code in [200, 201]
+    except Exception as e:
+        print(f"Error assigning {member_name} to ticket: {str(e)}")
+        return False
+
+async def _assign_technician(ticket_id: int, tech_name: str, semaphore: asyncio.Semaphore) -> Dict:
+    """Look up one technician and assign them to the ticket; never raises."""
+    result = {"technician": tech_name, "member_id": None, "assigned": False, "error": None}
+    async with semaphore:
         try:
-            # Method 1: Try using the schedule API
-            schedule_data = {
-                "objectId": ticket_id,
-                "type": {"identifier": "S"},  # S for Service ticket
-                "member": {"id": member_id},
-                "workRole": {"name": "Technician"},
-                "dateStart": datetime.utcnow().isoformat() + "Z",
-                "timeZone": {"name": "GMT-8/Pacific Time: US & Canada (UTC-07)"}
-            }
-            response = await client.post(
-                f"{BASE_URL}/schedule/entries",
-                headers=HEADERS,
-                json=schedule_data,
-                timeout=30.0
-            )
-            if response.status_code == 201:
-                return True
-            # Method 2: Try using the ticket update endpoint
-            update_data = [{
-                "op": "add",
-                "path": "/resources",
-                "value": member_name
-            }]
-            patch_response = await client.patch(
-                f"{BASE_URL}/service/tickets/{ticket_id}",
-                headers=HEADERS,
-                json=update_data,
-                timeout=30.0
-            )
-            return patch_response.status_code in [200, 201]
+            member = await find_member_by_name(tech_name)
+            if not member:
+                result["error"] = "No matching ConnectWise member"
+                return result
+            result["member_id"] = member["id"]
+            result["assigned"] = await assign_technician_to_ticket(ticket_id, member["id"], tech_name)
+            if not result["assigned"]:
+                result["error"] = "ConnectWise rejected the assignment"
         except Exception as e:
-            print(f"Error assigning {member_name} to ticket: {str(e)}")
-            return False
+            result["error"] = str(e)
+    return result
+
+async def assign_technicians(ticket_id: int, technicians: List[str]) -> List[Dict]:
+    """Assign every technician concurrently (at most CW_ASSIGN_CONCURRENCY at once)."""
+    semaphore = asyncio.Semaphore(ASSIGN_CONCURRENCY)
+    return list(await asyncio.gather(*(
+        _assign_technician(ticket_id, tech_name, semaphore) for tech_name in technicians
+    )))
 
 async def create_project_ticket(
     company_id: int,
     workstations: List[Dict],
     board_name: str = "Professional Services"
-) -> Tuple[bool, Optional[int], str]:
+) -> Tuple[bool, Optional[int], str, List[Dict]]:
     """
     Create a project ticket for Windows 11 upgrades.
-    Returns (success, ticket_id, error_message)
+    Returns (success, ticket_id, error_message, assignments), where
+    assignments has one {"technician", "member_id", "assigned", "error"}
+    dict per technician.
     """
     # Build the ticket description
     description_lines = [
@@ -185,41 +394,29 @@ async def create_project_ticket(
         "resources": resources_str  # Comma-separated list of technician names
     }
     print(f"[DEBUG] Creating ticket with data: {ticket_data}")
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{BASE_URL}/service/tickets",
-            headers=HEADERS,
-            json=ticket_data,
-            timeout=30.0
-        )
-        print(f"[DEBUG] Ticket creation response: {response.status_code}")
-        if response.status_code != 201:
-            error_detail = ""
-            try:
-                error_json = response.json()
-                error_detail = error_json.get("message", response.text)
-                if "errors" in error_json:
-                    for err in error_json.get("errors", []):
-                        error_detail += f"\n{err.get('message', '')}"
-            except Exception as e:
-                error_detail = f"Error decoding response: {e}\n{response.text}"
-            print(f"[ERROR] Ticket creation failed: {error_detail}")
-            return False, None, f"Failed to create ticket: {error_detail}"
-        ticket = response.json()
-        ticket_id = ticket['id']
-        print(f"[DEBUG] Ticket created successfully with ID: {ticket_id}")
-        # Assign technicians to the ticket
-        for tech_name in unique_technicians:
-            print(f"[DEBUG] Looking up technician: {tech_name}")
-            member = await find_member_by_name(tech_name)
-            if member:
-                print(f"[DEBUG] Found member {tech_name} with ID: {member['id']}")
-                success = await assign_technician_to_ticket(ticket_id, member['id'], tech_name)
-                if not success:
-                    print(f"Warning: Failed to assign {tech_name} to ticket {ticket_id}")
-            else:
-                print(f"Warning: Could not find member {tech_name} in ConnectWise")
-        return True, ticket_id, "Ticket created successfully"
+    response = await cw_client.post(
+        "/service/tickets",
+        json=ticket_data
+    )
+    print(f"[DEBUG] Ticket creation response: {response.status_code}")
+    if response.status_code != 201:
+        error_detail = ""
+        try:
+            error_json = response.json()
+            error_detail = error_json.get("message", response.text)
+            if "errors" in error_json:
+                for err in error_json.get("errors", []):
+                    error_detail += f"\n{err.get('message', '')}"
+        except Exception as e:
+            error_detail = f"Error decoding response: {e}\n{response.text}"
+        print(f"[ERROR] Ticket creation failed: {error_detail}")
+        return False, None, f"Failed to create ticket: {error_detail}", []
+    ticket = response.json()
+    ticket_id = ticket['id']
+    print(f"[DEBUG] Ticket created successfully with ID: {ticket_id}")
+    # Assign technicians to the ticket
+    assignments = await assign_technicians(ticket_id, sorted(unique_technicians))
+    return True, ticket_id, "Ticket created successfully", assignments
 
 def check_company_workstations_ready(workstations: List[Dict]) -> bool:
     """Check if all workstations for a company have status and technician assigned."""
@@ -0,0 +1,57 @@
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from models import Base
+from search import ensure_fts
+
+DB_PATH = 'sqlite:///./database.db'
+
+# PRAGMAs applied to every new connection. Pick one with SQLITE_PROFILE and
+# override single values with SQLITE_<PRAGMA>, e.g. SQLITE_BUSY_TIMEOUT=60000.
+STORAGE_PROFILES = {
+    "production": {
+        # WAL lets readers keep seeing the last committed data while an import writes
+        "journal_mode": "WAL",
+        # With WAL, NORMAL only fsyncs at checkpoints; a power loss can drop
+        # the last commits but never corrupts the database
+        "synchronous": "NORMAL",
+        "busy_timeout": 30000,      # ms to wait for a lock before "database is locked"
+        "cache_size": -65536,       # negative = KiB, so 64 MiB of page cache
+        "mmap_size": 268435456,     # 256 MiB memory-mapped reads
+        "temp_store": "MEMORY",
+    },
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 30000,
+    },
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+
+
+def storage_pragmas(profile=SQLITE_PROFILE):
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}; expected one of {', '.join(STORAGE_PROFILES)}")
+    pragmas = dict(STORAGE_PROFILES[profile])
+    for name in {*pragmas, *STORAGE_PROFILES["production"]}:
+        override = os.getenv(f"SQLITE_{name.upper()}")
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+
+engine = create_engine(DB_PATH, connect_args={"check_same_thread": False})
+PRAGMAS = storage_pragmas()
+
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+SessionLocal = sessionmaker(bind=engine)
+Base.metadata.create_all(bind=engine)
+ensure_fts(engine)
@@ -0,0 +1,225 @@
+import io
+import csv
+import json
+from sqlalchemy import select
+from openpyxl import Workbook
+from models import Client, Workstation
+from queries import search_workstations
+
+EXPORT_HEADER = [
+    "Client",
+    "Computer Name",
+    "Processor Name",
+    "RAM (GB)",
+    "Disk Space Remaining (GB)",
+    "Status",
+    "Technician",
+    "Notes",
+    "Updated in Automate",
+    "Completed Date",
+]
+EXPORT_BATCH_SIZE = 1000
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def export_statement(client="", ram="", technician="", status="", search="", automate=""):
+    """
+    Column-only SELECT for the export, with the export's partial-match filters.
+
+    Rows come back as plain tuples in EXPORT_HEADER order (no ORM objects).
+    """
+    stmt = (
+        select(
+            Client.name,
+            Workstation.computer_name,
+            Workstation.processor_name,
+            Workstation.ram_gb,
+            Workstation.diskspace_remaining_gb,
+            Workstation.status,
+            Workstation.technician,
+            Workstation.notes,
+            Workstation.updated_in_automate,
+            Workstation.completed_at,
+        )
+        .select_from(Workstation)
+        .outerjoin(Client, Workstation.client_id == Client.id)
+    )
+    if client:
+        stmt = stmt.where(Client.name.ilike(f"%{client.strip()}%"))
+    if ram:
+        stmt = stmt.where(Workstation.ram_gb.ilike(f"%{ram.strip()}%"))
+    if technician:
+        stmt = stmt.where(Workstation.technician.ilike(f"%{technician.strip()}%"))
+    if status:
+        stmt = stmt.where(Workstation.status.ilike(f"%{status.strip()}%"))
+    if automate:
+        if automate == "updated":
+            stmt = stmt.where(Workstation.updated_in_automate == True)
+        elif automate == "not-updated":
+            stmt = stmt.where(Workstation.updated_in_automate == False)
+    if search:
+        stmt = search_workstations(stmt, search)
+    return stmt
+
+
+def format_export_row(row):
+    """Turn a raw result tuple into the text values written to CSV/XLSX."""
+    client_name, computer, processor, ram, disk, status, technician, notes, automate, completed_at = row
+    return [
+        client_name or "",
+        computer,
+        processor,
+        ram,
+        disk,
+        status,
+        technician,
+        notes,
+        "Yes" if automate else "No",
+        completed_at.strftime("%Y-%m-%d %H:%M") if completed_at else "",
+    ]
+
+
+def iter_export_batches(stmt, session_factory, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield lists of result rows straight off the database cursor.
+
+    The generator owns its session, because a streaming response body is
+    consumed after the request's own dependencies have been torn down.
+    """
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def iter_csv_export(stmt, session_factory, batch_size=EXPORT_BATCH_SIZE):
+    """Yield CSV text one batch at a time, header first, so the first byte goes out immediately."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    yield buffer.getvalue()
+    for rows in iter_export_batches(stmt, session_factory, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(format_export_row(row) for row in rows)
+        yield buffer.getvalue()
+
+
+def write_xlsx_export(stmt, session_factory, fileobj, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Write the export to `fileobj` as XLSX with openpyxl's write-only mode,
+    which streams rows to disk instead of building the sheet in memory.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Workstations")
+    sheet.append(EXPORT_HEADER)
+    for rows in iter_export_batches(stmt, session_factory, batch_size):
+        for row in rows:
+            sheet.append(format_export_row(row))
+    workbook.save(fileobj)
+
+
+# Columnar exports use the import column names, so a Parquet export can be
+# re-imported as-is; the automate flag and completed date keep real types.
+COLUMNAR_FIELDS = [
+    ("Client Name", "string"),
+    ("Computer Name", "string"),
+    ("Processor Name", "string"),
+    ("RAM_GB", "string"),
+    ("DiskSpaceRemaining_GB", "string"),
+    ("Status", "string"),
+    ("Technician", "string"),
+    ("Notes", "string"),
+    ("Updated in Automate", "bool"),
+    ("Completed Date", "timestamp"),
+]
+COLUMNAR_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    types = {"string": pa.string(), "bool": pa.bool_(), "timestamp": pa.timestamp("s")}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNAR_FIELDS])
+
+
+def _record_batch(rows, schema):
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+class _ChunkSink:
+    """Minimal write-only file object that hands written bytes back out in chunks."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def write_parquet_export(stmt, session_factory, fileobj, batch_size=EXPORT_BATCH_SIZE):
+    """Write the export as Parquet (zstd), one row group per cursor batch."""
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema()
+    with pq.ParquetWriter(fileobj, schema, compression="zstd") as writer:
+        for rows in iter_export_batches(stmt, session_factory, batch_size):
+            writer.write_batch(_record_batch(rows, schema))
+
+
+def iter_arrow_export(stmt, session_factory, batch_size=EXPORT_BATCH_SIZE):
+    """Yield an Arrow IPC stream: the schema first, then one record batch per cursor batch."""
+    import pyarrow as pa
+
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for rows in iter_export_batches(stmt, session_factory, batch_size):
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_ndjson_export(stmt, session_factory, batch_size=EXPORT_BATCH_SIZE):
+    """Yield one JSON object per line, a batch of lines at a time."""
+    names = [name for name, _ in COLUMNAR_FIELDS]
+    for rows in iter_export_batches(stmt, session_factory, batch_size):
+        lines = []
+        for row in rows:
+            record = dict(zip(names, row))
+            if record["Completed Date"]:
+                record["Completed Date"] = record["Completed Date"].isoformat()
+            record["Updated in Automate"] = bool(record["Updated in Automate"])
+            lines.append(json.dumps(record))
+        yield "\n".join(lines) + "\n"
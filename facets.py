@@ -0,0 +1,82 @@
+import threading
+from sqlalchemy import func, select
+from models import Client, Workstation
+
+
+def _ram_sort_key(value):
+    try:
+        return (float(value), value)
+    except ValueError:
+        return (float("inf"), value)
+
+
+def with_known_values(counts, known):
+    """Known values first in their usual order (0 when absent), then any others."""
+    options = [{"value": value, "count": counts.get(value, 0)} for value in known]
+    options += [{"value": v, "count": n} for v, n in counts.items() if v not in known]
+    return options
+
+
+class FacetService:
+    """
+    Distinct values with workstation counts for the filter dropdowns.
+
+    Each facet is one grouped aggregate query. Results are cached against
+    the data version passed in (the change log's seq, which every write
+    path bumps), so renders between edits don't touch the database.
+    """
+
+    def __init__(self, technicians=(), statuses=()):
+        self.technicians = list(technicians)
+        self.statuses = list(statuses)
+        self._version = None
+        self._facets = None
+        self._lock = threading.Lock()
+
+    def get(self, db, version):
+        """Facets as of `version`; read the version before calling so later writes aren't missed."""
+        with self._lock:
+            if self._facets is not None and self._version == version:
+                return self._facets
+        facets = self.compute(db)
+        with self._lock:
+            self._version = version
+            self._facets = facets
+        return facets
+
+    def compute(self, db):
+        clients = db.execute(
+            select(Client.name, func.count(Workstation.id))
+            .outerjoin(Workstation, Workstation.client_id == Client.id)
+            .group_by(Client.id)
+            .order_by(Client.name)
+        ).all()
+        ram = dict(db.execute(
+            select(Workstation.ram_gb, func.count())
+            .where(Workstation.ram_gb.is_not(None), Workstation.ram_gb != "")
+            .group_by(Workstation.ram_gb)
+        ).all())
+        technicians = dict(db.execute(
+            select(Workstation.technician, func.count())
+            .where(Workstation.technician.is_not(None), Workstation.technician != "")
+            .group_by(Workstation.technician)
+        ).all())
+        statuses = dict(db.execute(
+            select(Workstation.status, func.count())
+            .where(Workstation.status.is_not(None))
+            .group_by(Workstation.status)
+        ).all())
+        automate = dict(db.execute(
+            select(Workstation.updated_in_automate, func.count())
+            .group_by(Workstation.updated_in_automate)
+        ).all())
+        return {
+            "client": [{"value": name, "count": n} for name, n in clients],
+            "ram": [{"value": v, "count": ram[v]} for v in sorted(ram, key=_ram_sort_key)],
+            "technician": with_known_values(technicians, self.technicians),
+            "status": with_known_values(statuses, self.statuses),
+            "automate": {
+                "updated": automate.get(True, 0),
+                "not-updated": sum(n for flag, n in automate.items() if not flag),
+            },
+        }
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """
+    Bounded LRU cache of rendered dashboard HTML.
+
+    Keys include the data version, so an entry can never be served after
+    the data changes; write paths still call invalidate() to free the
+    memory straight away. Concurrent misses for the same key wait for the
+    first render instead of rendering it again, so N browsers refreshing
+    the same view after an edit cost one render.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_render(self, key, render):
+        """Cached body for `key`, calling `render()` (returning bytes) at most once per miss."""
+        body = self.get(key)
+        if body is not None:
+            return body
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            body = self.get(key)
+            if body is not None:
+                return body
+            with self._lock:
+                self.misses += 1
+            body = render()
+            self.put(key, body)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return body
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
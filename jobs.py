@@ -0,0 +1,137 @@
+import os
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils import iter_import_batches
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportJob:
+    """State of one background import. Mutated only by the worker thread."""
+
+    def __init__(self, path, filename, mode="replace", delete_missing=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.filename = filename
+        self.mode = mode
+        self.delete_missing = delete_missing
+        self.status = "queued"  # queued -> running -> completed / failed / cancelled
+        self.progress = {}
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "mode": self.mode,
+            "delete_missing": self.delete_missing,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ImportJobRunner:
+    """
+    Runs imports on a single worker thread so the event loop stays free.
+
+    Jobs are kept in an in-memory table (most recent `history` entries).
+    `on_update(job)` is called from the worker thread whenever a job changes.
+    """
+
+    def __init__(self, session_factory, max_workers=1, history=50, on_update=None):
+        self.session_factory = session_factory
+        self.history = history
+        self.on_update = on_update
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="import")
+
+    def submit(self, path, filename, mode="replace", delete_missing=False):
+        job = ImportJob(path, filename, mode, delete_missing)
+        with self._lock:
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.history:
+                oldest = next(iter(self.jobs.values()))
+                if not oldest.finished:
+                    break
+                self.jobs.popitem(last=False)
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self.jobs.values()))
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def shutdown(self):
+        for job in self.list():
+            job.cancel_event.set()
+        self._executor.shutdown(wait=True)
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"[IMPORT] Job update callback failed: {e}")
+
+    def _run(self, job):
+        db = self.session_factory()
+        batches = None
+        try:
+            if job.cancel_event.is_set():
+                raise ImportCancelled()
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            self._notify(job)
+            batches = iter_import_batches(job.path, db, mode=job.mode, delete_missing=job.delete_missing)
+            for progress in batches:
+                job.progress = progress
+                if progress.get("done"):
+                    break
+                if job.cancel_event.is_set():
+                    raise ImportCancelled()
+                self._notify(job)
+            job.status = "completed"
+        except ImportCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            if batches is not None:
+                # Closing a partially consumed import rolls its transaction back
+                batches.close()
+            db.close()
+            if os.path.exists(job.path):
+                os.remove(job.path)
+            job.finished_at = datetime.utcnow()
+            self._notify(job)
@@ -1,53 +1,109 @@
-from fastapi import FastAPI, Request, Form, UploadFile, File, Depends, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Query
+from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse, JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import create_engine, select, or_, and_, func
-from sqlalchemy.orm import sessionmaker, joinedload
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from sqlalchemy import select, and_, func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
 from starlette.status import HTTP_303_SEE_OTHER
+from contextlib import asynccontextmanager
 import os
-import io
-import csv
+import asyncio
+import hashlib
 import json
-from datetime import datetime
-from models import Base, Client, Workstation
-from utils import import_csv_to_db, export_workstations
-from connectwise_api import find_company_by_name, create_project_ticket, check_company_workstations_ready
+import shutil
+import tempfile
+from models import Workstation
+from database import engine, SessionLocal, SQLITE_PROFILE, PRAGMAS
+from utils import export_workstations
+from exporters import (
+    export_statement, iter_csv_export, write_xlsx_export, write_parquet_export,
+    iter_arrow_export, iter_ndjson_export, XLSX_MEDIA_TYPE, COLUMNAR_MEDIA_TYPES,
+)
+from jobs import ImportJobRunner
+from tickets import BulkTicketRunner
+from stats import StatsService
+from changes import ChangeLog
+from broadcast import ConnectionManager
+from facets import FacetService
+from repository import Database, WorkstationRepository, parse_bool, EDITABLE_FIELDS
+from compression import CompressionMiddleware
+from metrics import REGISTRY, CONTENT_TYPE, TEMPLATE_RENDER_SECONDS, MetricsMiddleware, instrument_engine
+from fragment_cache import FragmentCache
+from queries import (
+    filter_workstations, client_group_summaries, client_rows_page, client_summary, client_summaries,
+)
+from connectwise_api import cw_client, company_directory, member_directory, find_company_by_name, create_project_ticket, check_company_workstations_ready
 
-DB_PATH = 'sqlite:///./database.db'
-engine = create_engine(DB_PATH, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(bind=engine)
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.loop = asyncio.get_running_loop()
+    await cw_client.start()
+    # Load the ConnectWise directories before the first ticket request needs them
+    warm_ups = [
+        asyncio.create_task(directory.warm_up()) for directory in (company_directory, member_directory)
+    ] if cw_client.base_url else []
+    yield
+    for task in warm_ups:
+        task.cancel()
+    job_runner.shutdown()
+    await ticket_runner.shutdown()
+    await manager.shutdown()
+    await cw_client.aclose()
+    database.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=1000)
+# Outermost, so latency includes compression
+app.add_middleware(MetricsMiddleware)
+# Log statements slower than this (with their parameters); 0 disables
+instrument_engine(engine, slow_query_ms=float(os.getenv("SQL_SLOW_QUERY_MS", "0")))
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections = set()
+manager = ConnectionManager(
+    max_queue=int(os.getenv("WS_QUEUE_SIZE", "256")),
+    slow_policy=os.getenv("WS_SLOW_POLICY", "disconnect"),
+    # Hold broadcasts this long so bursts of edits go out as one message; 0 disables
+    coalesce_seconds=int(os.getenv("WS_COALESCE_MS", "50")) / 1000,
+)
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.add(websocket)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
+def on_import_job_update(job):
+    """Called from the import worker thread; hand the broadcast to the event loop."""
+    loop = getattr(app.state, "loop", None)
+    if loop is None or loop.is_closed():
+        return
+    asyncio.run_coroutine_threadsafe(manager.broadcast({"action": "import_job", **job.to_dict()}), loop)
+    if job.status == "completed":
+        # Too many rows changed to send as deltas; clients reload instead
+        stats_service.invalidate()
+        change = record_change("refresh", reason="import")
+        asyncio.run_coroutine_threadsafe(manager.broadcast(change), loop)
 
-    async def broadcast(self, message: dict):
-        data = json.dumps(message)
-        disconnected = []
-        for connection in list(self.active_connections):
-            try:
-                await connection.send_text(data)
-            except Exception:
-                disconnected.append(connection)
-        for conn in disconnected:
-            self.disconnect(conn)
 
+# Every DB call from a route goes through this bounded pool, off the event loop
+database = Database(SessionLocal, max_workers=int(os.getenv("DB_POOL_SIZE", "4")))
+workstations_repo = WorkstationRepository(database)
+job_runner = ImportJobRunner(SessionLocal, on_update=on_import_job_update)
+stats_service = StatsService(SessionLocal)
+change_log = ChangeLog()
+fragment_cache = FragmentCache(
+    max_entries=int(os.getenv("FRAGMENT_CACHE_ENTRIES", "64")),
+    max_bytes=int(os.getenv("FRAGMENT_CACHE_MB", "16")) * 1024 * 1024,
+)
 
-manager = ConnectionManager()
+
+def record_change(action, **data):
+    """Log a data change (bumping the data version) and drop cached renders."""
+    change = change_log.record(action, **data)
+    fragment_cache.invalidate()
+    return change
 
 TECHNICIANS = ["Brian", "Ed", "Steven", "Roy", "Jessica"]
 STATUS_LIST = [
@@ -55,33 +111,33 @@ STATUS_LIST = [
     "Waiting on Product", "Must Quote", "Awaiting Client Response", "Needs RAM Upgrade", "Completed"
 ]
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+facet_service = FacetService(technicians=TECHNICIANS, statuses=STATUS_LIST)
+
+# Paginated dashboard: group headers first, rows loaded per client on expand.
+# Can be switched per request with ?paged=1 / ?paged=0.
+DASHBOARD_PAGED = os.getenv("DASHBOARD_PAGED", "0") == "1"
+ROWS_PAGE_SIZE = 200
 
 def compute_stats(db):
-    total = db.query(Workstation).count()
-    completed = db.query(Workstation).filter(Workstation.status == "Completed").count()
-    in_progress = db.query(Workstation).filter(Workstation.status == "In Progress").count()
-    ready = db.query(Workstation).filter(Workstation.status == "Ready to Upgrade").count()
-    not_started = db.query(Workstation).filter(
-        Workstation.status.in_(["- Select Status -", "Assigned", "Pending Upgrade"])
-    ).count()
-    completed_and_updated = db.query(Workstation).filter(
-        Workstation.status == "Completed",
-        Workstation.updated_in_automate == True,
-    ).count()
-    return {
-        "total": total,
-        "completed": completed,
-        "in_progress": in_progress,
-        "not_started": not_started,
-        "ready_to_upgrade": ready,
-        "completed_and_updated": completed_and_updated,
-    }
+    return stats_service.snapshot(db)
+
+def render_row(row):
+    """Render one dashboard row from a workstation object or workstation_data dict."""
+    return templates.get_template("_workstation_row.html").render(
+        ws=row, statuses=STATUS_LIST, technicians=TECHNICIANS
+    )
+
+def _row_change_context(db, client_id):
+    return client_summary(db, client_id), stats_service.snapshot(db)
+
+async def publish_row_change(action, row, html=None):
+    """Record a row_added/row_updated/row_removed delta and broadcast it."""
+    client, stats = await database.run(_row_change_context, row["client_id"])
+    change = record_change(action, row=row, html=html, client=client, stats=stats)
+    await manager.broadcast(change)
+
+def wants_json(request: Request):
+    return request.headers.get("x-requested-with") == "XMLHttpRequest" or "application/json" in request.headers.get("accept", "")
 
 def build_dashboard_context(
     request: Request,
@@ -92,35 +148,36 @@ def build_dashboard_context(
     status: str = "",
     search: str = "",
     automate: str = "",
+    paged: bool = False,
 ):
-    ws_query = db.query(Workstation).options(joinedload(Workstation.client))
+    # Read before querying so anything committed meanwhile is replayed, not lost
+    seq = change_log.seq
+    filters = dict(client=client, ram=ram, technician=technician, status=status, search=search, automate=automate)
+    if paged:
+        # Group headers only; rows are fetched per client on expand
+        clients_list = client_group_summaries(db, **filters)
+    else:
+        clients_list = build_client_groups(db, **filters)
 
-    if client:
-        ws_query = ws_query.join(Client).filter(Client.name == client)
-    if ram:
-        ws_query = ws_query.filter(Workstation.ram_gb == ram)
-    if technician:
-        ws_query = ws_query.filter(Workstation.technician == technician)
-    if status:
-        ws_query = ws_query.filter(Workstation.status == status)
-    if automate:
-        if automate == "updated":
-            ws_query = ws_query.filter(Workstation.updated_in_automate == True)
-        elif automate == "not-updated":
-            ws_query = ws_query.filter(Workstation.updated_in_automate == False)
-    if search:
-        like = f"%{search}%"
-        ws_query = ws_query.filter(
-            or_(
-                Workstation.computer_name.ilike(like),
-                Workstation.processor_name.ilike(like),
-                Workstation.diskspace_remaining_gb.ilike(like),
-                Workstation.notes.ilike(like),
-                Client.name.ilike(like)
-            )
-        )
+    stats = compute_stats(db)
+
+    return {
+        "request": request,
+        "clients": clients_list,
+        "technicians": TECHNICIANS,
+        "statuses": STATUS_LIST,
+        "facets": facet_service.get(db, seq),
+        "stats": stats,
+        "paged": paged,
+        "seq": seq,
+        "epoch": change_log.epoch,
+    }
 
-    workstations = ws_query.all()
+
+def build_client_groups(db, **filters):
+    """Load every matching workstation and group it by client (non-paged dashboard)."""
+    ws_query = db.query(Workstation).options(joinedload(Workstation.client))
+    workstations = filter_workstations(ws_query, **filters).all()
 
     clients = {}
     for ws in workstations:
@@ -149,29 +206,61 @@ def build_dashboard_context(
             for ws in client_data["workstations"]
         ]
         client_data["ready_for_ticket"] = check_company_workstations_ready(ws_dicts)
+        client_data["total"] = len(client_data["workstations"])
+        client_data["ready_count"] = sum(1 for ws in client_data["workstations"] if ws.status == "Ready to Upgrade")
+        client_data["completed_count"] = sum(1 for ws in client_data["workstations"] if ws.status == "Completed")
 
     clients_list = list(clients.values())
     clients_list.sort(key=lambda c: c["name"])
+    return clients_list
 
-    stats = compute_stats(db)
 
-    all_clients = [c.name for c in db.query(Client).order_by(Client.name)]
-    all_ram = sorted(set(ws.ram_gb for ws in db.query(Workstation) if ws.ram_gb))
-    all_clients_objs = db.query(Client).order_by(Client.name).all()
+def use_paged_dashboard(paged: str) -> bool:
+    return paged == "1" if paged else DASHBOARD_PAGED
 
-    return {
-        "request": request,
-        "clients": clients_list,
-        "technicians": TECHNICIANS,
-        "statuses": STATUS_LIST,
-        "all_clients": all_clients,
-        "all_ram": all_ram,
-        "all_clients_objs": all_clients_objs,
-        "stats": stats,
-    }
+def render_template(name, context):
+    with TEMPLATE_RENDER_SECONDS.time(template=name):
+        return templates.get_template(name).render(context).encode("utf-8")
+
+def data_etag(view, **params):
+    """
+    Weak ETag for one view of the data: the change log's epoch and seq, which
+    every write path bumps, plus the normalized request parameters.
+    """
+    normalized = sorted((k, str(v).strip()) for k, v in params.items() if v is not None and str(v).strip())
+    digest = hashlib.sha1(json.dumps([view, normalized]).encode()).hexdigest()[:16]
+    return f'W/"{change_log.epoch}-{change_log.seq}-{digest}"'
+
+def not_modified(request: Request, etag):
+    """A 304 response if the client already has `etag`, otherwise None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+def etag_headers(etag):
+    # no-cache: browsers may store the response but must revalidate it
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+async def render_dashboard(request: Request, template, etag, paged, filters):
+    """304, a cached render, or a fresh render on the DB pool."""
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    body = fragment_cache.get(etag)
+    if body is None:
+        def render(db):
+            return fragment_cache.get_or_render(
+                etag, lambda: render_template(template, build_dashboard_context(request, db, paged=paged, **filters))
+            )
+        body = await database.run(render)
+    return HTMLResponse(body, headers=etag_headers(etag))
 
 @app.get("/", response_class=HTMLResponse)
-def dashboard(
+async def dashboard(
     request: Request,
     client: str = "",
     ram: str = "",
@@ -179,23 +268,16 @@ def dashboard(
     status: str = "",
     search: str = "",
     automate: str = "",
-    db=Depends(get_db)
+    paged: str = "",
 ):
-    context = build_dashboard_context(
-        request,
-        db,
-        client=client,
-        ram=ram,
-        technician=technician,
-        status=status,
-        search=search,
-        automate=automate,
-    )
-    return templates.TemplateResponse("dashboard.html", context)
+    filters = dict(client=client, ram=ram, technician=technician, status=status, search=search, automate=automate)
+    paged = use_paged_dashboard(paged)
+    etag = data_etag("dashboard", paged=int(paged), **filters)
+    return await render_dashboard(request, "dashboard.html", etag, paged, filters)
 
 
 @app.get("/fragment", response_class=HTMLResponse)
-def dashboard_fragment(
+async def dashboard_fragment(
     request: Request,
     client: str = "",
     ram: str = "",
@@ -203,19 +285,57 @@ def dashboard_fragment(
     status: str = "",
     search: str = "",
     automate: str = "",
-    db=Depends(get_db),
+    paged: str = "",
 ):
-    context = build_dashboard_context(
-        request,
-        db,
-        client=client,
-        ram=ram,
-        technician=technician,
-        status=status,
-        search=search,
-        automate=automate,
+    filters = dict(client=client, ram=ram, technician=technician, status=status, search=search, automate=automate)
+    paged = use_paged_dashboard(paged)
+    etag = data_etag("fragment", paged=int(paged), **filters)
+    return await render_dashboard(request, "dashboard_fragment.html", etag, paged, filters)
+
+@app.get("/clients/{client_id}/rows", response_class=HTMLResponse)
+async def client_rows(
+    request: Request,
+    client_id: int,
+    after_name: str = None,
+    after_id: int = None,
+    limit: int = ROWS_PAGE_SIZE,
+    ram: str = "",
+    technician: str = "",
+    status: str = "",
+    search: str = "",
+    automate: str = "",
+):
+    """One keyset page of a client's workstation rows for the paginated dashboard."""
+    etag = data_etag(
+        "client_rows", client_id=client_id, after_name=after_name, after_id=after_id, limit=limit,
+        ram=ram, technician=technician, status=status, search=search, automate=automate,
     )
-    return templates.TemplateResponse("dashboard_fragment.html", context)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    def render(db):
+        workstations, next_cursor = client_rows_page(
+            db,
+            client_id,
+            after_name=after_name,
+            after_id=after_id,
+            limit=max(1, min(limit, 1000)),
+            ram=ram,
+            technician=technician,
+            status=status,
+            search=search,
+            automate=automate,
+        )
+        return render_template("client_rows.html", {
+            "request": request,
+            "client_id": client_id,
+            "workstations": workstations,
+            "next_cursor": next_cursor,
+            "technicians": TECHNICIANS,
+            "statuses": STATUS_LIST,
+        })
+    return HTMLResponse(await database.run(render), headers=etag_headers(etag))
 
 @app.post("/workstations/add")
 async def add_workstation(
@@ -228,24 +348,25 @@ async def add_workstation(
     status: str = Form(...),
     technician: str = Form(""),
     notes: str = Form(""),
-    db=Depends(get_db)
 ):
-    ws = Workstation(
-        client_id=client_id,
-        computer_name=computer_name,
-        processor_name=processor_name,
-        ram_gb=ram_gb,
-        diskspace_remaining_gb=diskspace_remaining_gb,
-        status=status,
-        technician=technician,
-        notes=notes,
-        updated_in_automate=False
-    )
-    db.add(ws)
-    db.commit()
-    await manager.broadcast({"action": "refresh"})
-    if request.headers.get("x-requested-with") == "XMLHttpRequest" or "application/json" in request.headers.get("accept", ""):
-        return JSONResponse({"success": True})
+    with stats_service.writing():
+        try:
+            row = await workstations_repo.add(
+                client_id=client_id,
+                computer_name=computer_name,
+                processor_name=processor_name,
+                ram_gb=ram_gb,
+                diskspace_remaining_gb=diskspace_remaining_gb,
+                status=status,
+                technician=technician,
+                notes=notes,
+            )
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail=f"A workstation named '{computer_name}' already exists for this client")
+        stats_service.apply(None, (row["status"], row["updated_in_automate"]))
+    await publish_row_change("row_added", row, render_row(row))
+    if wants_json(request):
+        return JSONResponse({"success": True, "id": row["id"]})
     return RedirectResponse("/", status_code=HTTP_303_SEE_OTHER)
 
 @app.post("/workstations/{ws_id}/edit")
@@ -259,30 +380,27 @@ async def edit_workstation(
     status: str = Form(...),
     technician: str = Form(""),
     notes: str = Form(""),
-    db=Depends(get_db)
 ):
-    ws = db.query(Workstation).filter_by(id=ws_id).first()
-    if not ws:
-        raise HTTPException(status_code=404, detail="Workstation not found")
-    
-    # Track if status changed to completed
-    if ws.status != "Completed" and status == "Completed":
-        ws.completed_at = datetime.utcnow()
-    elif ws.status == "Completed" and status != "Completed":
-        # If changing from completed to something else, reset the automate checkbox
-        ws.updated_in_automate = False
-        ws.completed_at = None
-    
-    ws.computer_name = computer_name
-    ws.processor_name = processor_name
-    ws.ram_gb = ram_gb
-    ws.diskspace_remaining_gb = diskspace_remaining_gb
-    ws.status = status
-    ws.technician = technician
-    ws.notes = notes
-    db.commit()
-    await manager.broadcast({"action": "refresh"})
-    if request.headers.get("x-requested-with") == "XMLHttpRequest" or "application/json" in request.headers.get("accept", ""):
+    with stats_service.writing():
+        try:
+            result = await workstations_repo.edit(
+                ws_id,
+                computer_name=computer_name,
+                processor_name=processor_name,
+                ram_gb=ram_gb,
+                diskspace_remaining_gb=diskspace_remaining_gb,
+                status=status,
+                technician=technician,
+                notes=notes,
+            )
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail=f"A workstation named '{computer_name}' already exists for this client")
+        if result is None:
+            raise HTTPException(status_code=404, detail="Workstation not found")
+        before, row = result
+        stats_service.apply(before, (row["status"], row["updated_in_automate"]))
+    await publish_row_change("row_updated", row, render_row(row))
+    if wants_json(request):
         return JSONResponse({"success": True})
     return RedirectResponse("/", status_code=HTTP_303_SEE_OTHER)
 
@@ -290,90 +408,79 @@ async def edit_workstation(
 async def delete_workstation(
     request: Request,
     ws_id: int,
-    db=Depends(get_db)
 ):
-    ws = db.query(Workstation).filter_by(id=ws_id).first()
-    if ws:
-        db.delete(ws)
-        db.commit()
-        await manager.broadcast({"action": "refresh"})
-    if request.headers.get("x-requested-with") == "XMLHttpRequest" or "application/json" in request.headers.get("accept", ""):
+    with stats_service.writing():
+        result = await workstations_repo.delete(ws_id)
+        if result:
+            before, row = result
+            stats_service.apply(before, None)
+    if result:
+        await publish_row_change("row_removed", row)
+    if wants_json(request):
         return JSONResponse({"success": True})
     return RedirectResponse("/", status_code=HTTP_303_SEE_OTHER)
 
+FILE_EXPORTS = {
+    "xlsx": (write_xlsx_export, XLSX_MEDIA_TYPE),
+    "parquet": (write_parquet_export, COLUMNAR_MEDIA_TYPES["parquet"]),
+}
+STREAM_EXPORTS = {
+    "csv": (iter_csv_export, "text/csv"),
+    "arrow": (iter_arrow_export, COLUMNAR_MEDIA_TYPES["arrow"]),
+    "ndjson": (iter_ndjson_export, COLUMNAR_MEDIA_TYPES["ndjson"]),
+}
+
+def _write_file_export(write, stmt, fmt):
+    with tempfile.NamedTemporaryFile(prefix="export_", suffix=f".{fmt}", delete=False) as fh:
+        write(stmt, SessionLocal, fh)
+    return fh.name
+
 @app.get("/export")
-def export_filtered(
+async def export_filtered(
+    request: Request,
     client: str = "",
     ram: str = "",
     technician: str = "",
     status: str = "",
     search: str = "",
     automate: str = "",
-    db=Depends(get_db)
+    fmt: str = Query("csv", alias="format"),
 ):
-    ws_query = db.query(Workstation).options(joinedload(Workstation.client))
-    
-    if client:
-        ws_query = ws_query.join(Client).filter(Client.name.ilike(f"%{client.strip()}%"))
-    if ram:
-        ws_query = ws_query.filter(Workstation.ram_gb.ilike(f"%{ram.strip()}%"))
-    if technician:
-        ws_query = ws_query.filter(Workstation.technician.ilike(f"%{technician.strip()}%"))
-    if status:
-        ws_query = ws_query.filter(Workstation.status.ilike(f"%{status.strip()}%"))
-    if automate:
-        if automate == "updated":
-            ws_query = ws_query.filter(Workstation.updated_in_automate == True)
-        elif automate == "not-updated":
-            ws_query = ws_query.filter(Workstation.updated_in_automate == False)
-    if search:
-        like = f"%{search}%"
-        ws_query = ws_query.filter(
-            or_(
-                Workstation.computer_name.ilike(like),
-                Workstation.processor_name.ilike(like),
-                Workstation.diskspace_remaining_gb.ilike(like),
-                Workstation.notes.ilike(like),
-                Client.name.ilike(like)
-            )
+    etag = data_etag(
+        "export", format=fmt, client=client, ram=ram, technician=technician,
+        status=status, search=search, automate=automate,
+    )
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    stmt = export_statement(
+        client=client,
+        ram=ram,
+        technician=technician,
+        status=status,
+        search=search,
+        automate=automate,
+    )
+    if fmt in FILE_EXPORTS:
+        # XLSX (a zip) and Parquet (footer at the end) can't be emitted
+        # incrementally; write them to a temp file batch by batch (flat
+        # memory) and stream that.
+        write, media_type = FILE_EXPORTS[fmt]
+        path = await database.run_sync(_write_file_export, write, stmt, fmt)
+        return FileResponse(
+            path,
+            media_type=media_type,
+            filename=f"workstations.{fmt}",
+            headers=etag_headers(etag),
+            background=BackgroundTask(os.remove, path),
         )
-    
-    workstations = ws_query.all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "Client",
-        "Computer Name",
-        "Processor Name",
-        "RAM (GB)",
-        "Disk Space Remaining (GB)",
-        "Status",
-        "Technician",
-        "Notes",
-        "Updated in Automate",
-        "Completed Date"
-    ])
-    
-    for ws in workstations:
-        writer.writerow([
-            ws.client.name if ws.client else "",
-            ws.computer_name,
-            ws.processor_name,
-            ws.ram_gb,
-            ws.diskspace_remaining_gb,
-            ws.status,
-            ws.technician,
-            ws.notes,
-            "Yes" if ws.updated_in_automate else "No",
-            ws.completed_at.strftime("%Y-%m-%d %H:%M") if ws.completed_at else ""
-        ])
-    
-    output.seek(0)
+    if fmt not in STREAM_EXPORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format: {fmt}")
+    iter_export, media_type = STREAM_EXPORTS[fmt]
     return StreamingResponse(
-        output, 
-        media_type="text/csv", 
-        headers={"Content-Disposition": "attachment; filename=workstations.csv"}
+        database.iterate(iter_export(stmt, SessionLocal)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=workstations.{fmt}", **etag_headers(etag)}
     )
 
 @app.post("/update")
@@ -381,152 +488,325 @@ async def update_field(
     id: int = Form(...),
     field: str = Form(...),
     value: str = Form(...),
-    db=Depends(get_db)
 ):
-    ws = db.query(Workstation).filter_by(id=id).first()
-    if not ws:
-        return JSONResponse({"ok": False, "error": "Not found"})
-    
     # Only allow specific fields to be updated
-    if field not in ("status", "technician", "notes", "updated_in_automate"):
+    if field not in EDITABLE_FIELDS:
         return JSONResponse({"ok": False, "error": "Bad field"})
-    
-    # Handle status changes
-    if field == "status":
-        if ws.status != "Completed" and value == "Completed":
-            ws.completed_at = datetime.utcnow()
-        elif ws.status == "Completed" and value != "Completed":
-            ws.updated_in_automate = False
-            ws.completed_at = None
-    
-    # Handle automate checkbox
-    if field == "updated_in_automate":
-        ws.updated_in_automate = value.lower() in ['true', '1', 'yes']
-    else:
-        setattr(ws, field, value)
+    with stats_service.writing():
+        result = await workstations_repo.update_field(id, field, value)
+        if result is None:
+            return JSONResponse({"ok": False, "error": "Not found"})
+        before, row = result
+        stats_service.apply(before, (row["status"], row["updated_in_automate"]))
+    stats = await database.run(compute_stats)
+    await manager.broadcast(record_change(
+        "field_update",
+        id=row["id"],
+        field=field,
+        value=row[field],
+        stats=stats,
+    ))
+    return JSONResponse({"ok": True})
 
-    db.commit()
-    stats = compute_stats(db)
-    await manager.broadcast({
-        "action": "field_update",
-        "id": ws.id,
-        "field": field,
-        "value": getattr(ws, field),
-        "stats": stats,
-    })
-    return JSONResponse({"ok": True})
+MAX_BATCH_UPDATES = 5000
+
+def _bulk_change_context(db, client_ids):
+    return client_summaries(db, client_ids), stats_service.snapshot(db)
+
+@app.post("/update/batch")
+async def update_fields(request: Request):
+    """
+    Apply many inline edits in one transaction and one broadcast. Body:
+    {"changes": [{"id": 1, "field": "technician", "value": "Ed"}, ...]}
+    """
+    try:
+        changes = [(int(c["id"]), c["field"], str(c["value"])) for c in (await request.json())["changes"]]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Expected {\"changes\": [{\"id\", \"field\", \"value\"}, ...]}")
+    if len(changes) > MAX_BATCH_UPDATES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_UPDATES} changes per batch")
+    bad = sorted({field for _, field, _ in changes if field not in EDITABLE_FIELDS})
+    if bad:
+        return JSONResponse({"ok": False, "error": f"Bad field: {', '.join(bad)}"}, status_code=400)
+    if not changes:
+        return JSONResponse({"ok": True, "updated": 0, "missing": []})
+    with stats_service.writing():
+        results, missing = await workstations_repo.update_fields(changes)
+        for before, row in results.values():
+            stats_service.apply(before, (row["status"], row["updated_in_automate"]))
+    if results:
+        # Send each row's final value of every field that was touched
+        touched = list(dict.fromkeys((ws_id, field) for ws_id, field, _ in changes if ws_id in results))
+        rows = {ws_id: row for ws_id, (_, row) in results.items()}
+        clients, stats = await database.run(_bulk_change_context, [row["client_id"] for row in rows.values()])
+        await manager.broadcast(record_change(
+            "fields_updated",
+            updates=[{"id": ws_id, "field": field, "value": rows[ws_id][field]} for ws_id, field in touched],
+            clients=clients,
+            stats=stats,
+        ))
+    return JSONResponse({"ok": True, "updated": len(results), "missing": missing})
+
+@app.post("/update/bulk")
+async def bulk_update(
+    field: str = Form(...),
+    value: str = Form(...),
+    client: str = Form(""),
+    ram: str = Form(""),
+    technician: str = Form(""),
+    status: str = Form(""),
+    search: str = Form(""),
+    automate: str = Form(""),
+):
+    """Set one field on every workstation matching the dashboard filters, with a single UPDATE."""
+    if field not in EDITABLE_FIELDS:
+        return JSONResponse({"ok": False, "error": "Bad field"}, status_code=400)
+    filters = dict(client=client, ram=ram, technician=technician, status=status, search=search, automate=automate)
+    if not any(filters.values()):
+        return JSONResponse({"ok": False, "error": "Set at least one filter"}, status_code=400)
+    changed = await workstations_repo.bulk_update(filters, field, value)
+    if changed:
+        # Per-row before states aren't loaded for a set-based update
+        stats_service.invalidate()
+        clients, stats = await database.run(_bulk_change_context, [client_id for _, client_id in changed])
+        await manager.broadcast(record_change(
+            "bulk_update",
+            ids=[ws_id for ws_id, _ in changed],
+            field=field,
+            value=parse_bool(value) if field == "updated_in_automate" else value,
+            clients=clients,
+            stats=stats,
+        ))
+    return JSONResponse({"ok": True, "updated": len(changed)})
+
+def _spool_upload(upload: UploadFile):
+    """Copy an upload to a private temp file for the import worker (constant memory)."""
+    suffix = os.path.splitext(upload.filename or "")[1] or ".csv"
+    with tempfile.NamedTemporaryFile(prefix="import_", suffix=suffix, delete=False) as buffer:
+        upload.file.seek(0)
+        shutil.copyfileobj(upload.file, buffer, 1024 * 1024)
+        return buffer.name
 
 @app.post("/import")
 async def import_csv(
     request: Request,
     file: UploadFile = File(...),
-    db=Depends(get_db)
+    mode: str = Form("replace"),
+    delete_missing: bool = Form(False),
 ):
-    # Save uploaded file temporarily
-    temp_path = f"temp_{file.filename}"
-    with open(temp_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
-    try:
-        import_csv_to_db(temp_path, db)
-        os.remove(temp_path)
-        await manager.broadcast({"action": "refresh"})
-        if request.headers.get("x-requested-with") == "XMLHttpRequest" or "application/json" in request.headers.get("accept", ""):
-            return JSONResponse({"success": True})
-        return RedirectResponse("/", status_code=HTTP_303_SEE_OTHER)
-    except Exception as e:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        raise HTTPException(status_code=400, detail=str(e))
+    if mode not in ("replace", "merge"):
+        raise HTTPException(status_code=400, detail=f"Unknown import mode: {mode}")
+    # The import itself runs on the job runner's worker thread; the dashboard
+    # keeps serving the last committed data until it finishes.
+    temp_path = await run_in_threadpool(_spool_upload, file)
+    job = job_runner.submit(temp_path, file.filename, mode=mode, delete_missing=delete_missing)
+    if wants_json(request):
+        return JSONResponse({"success": True, "job_id": job.id, "job": job.to_dict()}, status_code=202)
+    return RedirectResponse("/", status_code=HTTP_303_SEE_OTHER)
+
+@app.get("/import/jobs")
+def list_import_jobs():
+    return JSONResponse({"jobs": [job.to_dict() for job in job_runner.list()]})
+
+@app.get("/import/jobs/{job_id}")
+def get_import_job(job_id: str):
+    job = job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return JSONResponse(job.to_dict())
+
+@app.post("/import/jobs/{job_id}/cancel")
+def cancel_import_job(job_id: str):
+    job = job_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return JSONResponse({"success": job_runner.cancel(job_id), "job": job.to_dict()})
+
+async def open_project_ticket(client_id: int):
+    """
+    Create and record the ConnectWise project ticket for one client.
+    Returns (HTTP status, response body) for the ticket endpoints.
+    """
+    # Get the client and all of its workstations
+    client_name, ws_data = await workstations_repo.client_workstations(client_id)
+    if client_name is None:
+        return 404, {"success": False, "error": "Client not found"}
+
+    existing = await workstations_repo.project_ticket(client_name)
+    if existing:
+        return 409, {"success": False, "error": f"Project ticket #{existing} was already created", "ticket_id": existing}
+
+    # Check if ready (all have status and technician)
+    if not check_company_workstations_ready(ws_data):
+        return 400, {
+            "success": False,
+            "error": "All workstations must have a status and technician assigned"
+        }
+
+    # Find the company in ConnectWise
+    cw_company = await find_company_by_name(client_name)
+    if not cw_company:
+        return 404, {
+            "success": False,
+            "error": f"Could not find company '{client_name}' in ConnectWise"
+        }
+
+    # Create the ticket
+    success, ticket_id, message, assignments = await create_project_ticket(
+        company_id=cw_company['id'],
+        workstations=ws_data
+    )
+    if not success:
+        return 500, {"success": False, "error": message}
+
+    await workstations_repo.record_project_ticket(client_name, ticket_id, cw_company['id'])
+    return 200, {
+        "success": True,
+        "ticket_id": ticket_id,
+        "message": message,
+        "cw_company_name": cw_company['name'],
+        "assignments": assignments,
+    }
 
 @app.post("/create-project-ticket/{client_id}")
 async def create_project_ticket_endpoint(
     client_id: int,
-    db=Depends(get_db)
 ):
     """Create a ConnectWise project ticket for Windows 11 upgrades."""
-    # Get the client
-    client = db.query(Client).filter_by(id=client_id).first()
-    if not client:
-        return JSONResponse({"success": False, "error": "Client not found"}, status_code=404)
-    
-    # Get all workstations for this client
-    workstations = db.query(Workstation).filter_by(client_id=client_id).all()
-    
-    # Convert to dict format for the API
-    ws_data = [
-        {
-            "computer_name": ws.computer_name,
-            "processor_name": ws.processor_name,
-            "ram_gb": ws.ram_gb,
-            "diskspace_remaining_gb": ws.diskspace_remaining_gb,
-            "status": ws.status,
-            "technician": ws.technician,
-            "notes": ws.notes
-        }
-        for ws in workstations
-    ]
-    
-    # Check if ready (all have status and technician)
-    if not check_company_workstations_ready(ws_data):
-        return JSONResponse({
-            "success": False, 
-            "error": "All workstations must have a status and technician assigned"
-        }, status_code=400)
-    
-    # Find the company in ConnectWise
-    cw_company = await find_company_by_name(client.name)
-    if not cw_company:
-        return JSONResponse({
-            "success": False,
-            "error": f"Could not find company '{client.name}' in ConnectWise"
-        }, status_code=404)
-    
-    # Create the ticket
-    success, ticket_id, message = await create_project_ticket(
-        company_id=cw_company['id'],
-        workstations=ws_data
-    )
-    
-    if success:
-        return JSONResponse({
-            "success": True,
-            "ticket_id": ticket_id,
-            "message": message,
-            "cw_company_name": cw_company['name']
-        })
-    else:
-        return JSONResponse({
-            "success": False,
-            "error": message
-        }, status_code=500)
+    status_code, body = await open_project_ticket(client_id)
+    return JSONResponse(body, status_code=status_code)
+
+async def bulk_ticket_for_client(client_id, client_name):
+    status_code, body = await open_project_ticket(client_id)
+    # Already ticketed or no longer ready: nothing to retry on a rerun
+    status = "created" if status_code == 200 else "skipped" if status_code in (400, 409) else "failed"
+    return {
+        "client_id": client_id,
+        "client_name": client_name,
+        "status": status,
+        "ticket_id": body.get("ticket_id"),
+        "error": body.get("error"),
+        "assignments": body.get("assignments", []),
+    }
+
+async def on_ticket_job_update(job, result):
+    await manager.broadcast({"action": "ticket_job", **job.to_dict(), "result": result})
+
+ticket_runner = BulkTicketRunner(
+    bulk_ticket_for_client,
+    concurrency=int(os.getenv("CW_TICKET_CONCURRENCY", "4")),
+    on_update=on_ticket_job_update,
+)
+
+@app.post("/create-project-tickets")
+async def create_project_tickets():
+    """
+    Create project tickets for every client that is ready and has none yet,
+    in the background. Progress is broadcast over /ws as ticket_job messages.
+    """
+    clients = await workstations_repo.ready_clients_without_ticket()
+    job = ticket_runner.submit(clients)
+    if job is None:
+        running = ticket_runner.running
+        return JSONResponse({"success": False, "error": "A bulk ticket run is already in progress",
+                             "job": running.to_dict()}, status_code=409)
+    return JSONResponse({"success": True, "job": job.to_dict()}, status_code=202)
+
+@app.get("/ticket-jobs/{job_id}")
+def get_ticket_job(job_id: str):
+    job = ticket_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ticket job not found")
+    return JSONResponse(job.to_dict(results=True))
+
+@app.post("/ticket-jobs/{job_id}/cancel")
+def cancel_ticket_job(job_id: str):
+    job = ticket_runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ticket job not found")
+    return JSONResponse({"success": ticket_runner.cancel(job_id), "job": job.to_dict()})
 
 @app.get("/check-ticket-readiness/{client_id}")
 async def check_ticket_readiness(
     client_id: int,
-    db=Depends(get_db)
 ):
     """Check if a client is ready for project ticket creation."""
-    workstations = db.query(Workstation).filter_by(client_id=client_id).all()
-    
-    ws_data = [
-        {
-            "status": ws.status,
-            "technician": ws.technician
-        }
-        for ws in workstations
-    ]
-    
+    _, ws_data = await workstations_repo.client_workstations(client_id)
     ready = check_company_workstations_ready(ws_data)
     return JSONResponse({"ready": ready})
 
 
+@app.get("/db/stats")
+def database_stats():
+    """DB pool size and write queue counters (jobs, commits, batch sizes, lock retries)."""
+    return JSONResponse({"profile": SQLITE_PROFILE, "pragmas": PRAGMAS, **database.stats()})
+
+
+REGISTRY.gauge("ws_connections", "Open dashboard WebSockets.", collect=lambda: len(manager.connections))
+REGISTRY.gauge("db_write_queue_depth", "Write jobs waiting for the writer thread.",
+               collect=lambda: database.writer.stats()["queued"])
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: request latency, SQL, template renders, WebSockets and ConnectWise calls."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and size of the rendered fragment cache."""
+    return JSONResponse(fragment_cache.stats())
+
+
+@app.get("/connectwise/stats")
+def connectwise_stats():
+    """Size, freshness and lookup counters of the cached ConnectWise directories."""
+    return JSONResponse({
+        "companies": company_directory.stats(),
+        "members": member_directory.stats(),
+        "rate_limited": cw_client.rate_limited,
+        "rate_limit_waits": cw_client.limiter.waits if cw_client.limiter else 0,
+    })
+
+
+@app.get("/facets")
+async def list_facets():
+    """Filter values with workstation counts (cached until the next change)."""
+    return JSONResponse(await database.run(facet_service.get, change_log.seq))
+
+
+@app.get("/changes")
+async def list_changes(since: int = 0, epoch: str = ""):
+    """
+    Deltas after `since` for a client catching up after a reconnect. When
+    they can't be replayed (too old, or the server restarted) the response
+    has reset=true and the client reloads the dashboard instead.
+    """
+    changes, complete = change_log.since(since, epoch or None)
+    return JSONResponse({
+        "epoch": change_log.epoch,
+        "seq": change_log.seq,
+        "reset": not complete,
+        "changes": changes,
+        "stats": await database.run(compute_stats),
+    })
+
+
+@app.get("/ws/stats")
+def websocket_stats():
+    """Per-connection queue depth, send latency and drop counts."""
+    return JSONResponse(manager.stats())
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
         while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
+            if await websocket.receive_text() == "ping":
+                manager.send(websocket, {"action": "pong"})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
         manager.disconnect(websocket)
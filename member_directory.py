@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+MEMBER_FIELDS = "id,identifier,firstName,lastName,inactiveFlag"
+
+
+class MemberDirectory:
+    """
+    Cached ConnectWise members (technicians), indexed by identifier, full
+    name, first name and last name.
+
+    The whole member list is paged in on first use and again every `ttl`
+    seconds; one refresh runs at a time however many lookups are waiting.
+    Names that aren't found are remembered until the next refresh, so a
+    technician missing from ConnectWise doesn't cost API calls on every
+    ticket.
+    """
+
+    def __init__(self, client, ttl=3600, page_size=1000):
+        self.client = client
+        self.ttl = ttl
+        self.page_size = page_size
+        self.members = {}
+        self.refreshed_at = 0.0
+        self.refreshes = 0
+        self.hits = 0
+        self.misses = 0
+        self._index = {}
+        self._missing = set()
+        self._lock = asyncio.Lock()
+
+    async def ensure_fresh(self):
+        if time.time() - self.refreshed_at < self.ttl:
+            return
+        async with self._lock:
+            if time.time() - self.refreshed_at < self.ttl:
+                return
+            await self.refresh()
+
+    async def refresh(self):
+        members = []
+        page = 1
+        while True:
+            response = await self.client.get("/system/members", params={
+                "page": page, "pageSize": self.page_size, "orderBy": "id asc", "fields": MEMBER_FIELDS,
+            })
+            response.raise_for_status()
+            batch = response.json()
+            members.extend(batch)
+            if len(batch) < self.page_size:
+                break
+            page += 1
+        self.members = {}
+        self._index = {}
+        self._missing = set()
+        for member in members:
+            self.add(member)
+        self.refreshed_at = time.time()
+        self.refreshes += 1
+        print(f"[CW] Member directory loaded: {len(self.members)} members")
+
+    async def warm_up(self):
+        try:
+            await self.ensure_fresh()
+        except Exception as e:
+            print(f"[CW] Member directory warm-up failed: {e}")
+
+    def add(self, member):
+        """Index one member; active members win over inactive ones for the same name."""
+        self.members[member["id"]] = member
+        first = (member.get("firstName") or "").strip().lower()
+        last = (member.get("lastName") or "").strip().lower()
+        keys = [
+            ("identifier", (member.get("identifier") or "").lower()),
+            ("name", f"{first} {last}".strip()),
+            ("first", first),
+            ("last", last),
+        ]
+        for kind, value in keys:
+            if not value:
+                continue
+            current = self._index.get((kind, value))
+            if current is None or (current.get("inactiveFlag") and not member.get("inactiveFlag")):
+                self._index[(kind, value)] = member
+        self._missing.clear()
+
+    def find(self, name):
+        """
+        The member for a technician name, in the order the API lookup used:
+        identifier (first.last), then full name, then first or last name.
+        """
+        value = (name or "").strip().lower()
+        for kind, key in (
+            ("identifier", value.replace(" ", ".")),
+            ("name", value),
+            ("first", value),
+            ("last", value),
+        ):
+            member = self._index.get((kind, key))
+            if member is not None:
+                self.hits += 1
+                return member
+        self.misses += 1
+        return None
+
+    def known_missing(self, name):
+        return (name or "").strip().lower() in self._missing
+
+    def mark_missing(self, name):
+        self._missing.add((name or "").strip().lower())
+
+    def stats(self):
+        return {
+            "members": len(self.members),
+            "refreshes": self.refreshes,
+            "age_seconds": round(time.time() - self.refreshed_at, 1) if self.refreshed_at else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "known_missing": len(self._missing),
+        }
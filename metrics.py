@@ -0,0 +1,299 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Seconds; request and render latencies mostly land between 1 ms and a few seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self):
+        """[(suffix, label values, extra labels, value)] for the exposition format."""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """A settable value, or with `collect` a callback read at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), collect=None):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.collect is not None:
+            return [("", (), (), self.collect())]
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        samples = []
+        for key, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", key, (("le", _format_value(float(bound))),), cumulative))
+            samples.append(("_sum", key, (), counts[-1]))
+            samples.append(("_count", key, (), cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), collect=None):
+        return self.register(Gauge(name, help, labelnames, collect))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time until the last response byte was sent.", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being handled.")
+REQUEST_QUERIES = REGISTRY.histogram(
+    "http_request_db_queries", "SQL statements run per HTTP request.", ("route",), QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = REGISTRY.histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request.", ("route",))
+DB_QUERIES = REGISTRY.counter("db_queries_total", "SQL statements run, by statement type.", ("statement",))
+DB_QUERY_SECONDS = REGISTRY.histogram("db_query_duration_seconds", "SQL statement duration.", ("statement",))
+DB_SLOW_QUERIES = REGISTRY.counter("db_slow_queries_total", "SQL statements slower than SQL_SLOW_QUERY_MS.")
+TEMPLATE_RENDER_SECONDS = REGISTRY.histogram(
+    "template_render_seconds", "Jinja template render time.", ("template",))
+WS_BROADCAST_SECONDS = REGISTRY.histogram(
+    "ws_broadcast_seconds", "Time to serialize a broadcast and queue it for every connection.")
+WS_BROADCAST_RECIPIENTS = REGISTRY.histogram(
+    "ws_broadcast_recipients", "Connections each broadcast was queued for.", buckets=QUERY_COUNT_BUCKETS)
+WS_SEND_SECONDS = REGISTRY.histogram(
+    "ws_send_seconds", "Time from queueing a message to sending it on one connection.")
+CW_REQUESTS = REGISTRY.counter(
+    "connectwise_requests_total", "ConnectWise API attempts, retries included.", ("method", "path", "status"))
+CW_LATENCY = REGISTRY.histogram(
+    "connectwise_request_duration_seconds", "ConnectWise API attempt duration.", ("method", "path"))
+
+
+def api_path(path):
+    """A ConnectWise path with ids replaced, e.g. /service/tickets/{id}, to keep label values bounded."""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path)
+
+
+# --- per-request SQL accounting ---
+
+class RequestDB:
+    """SQL statements and time for one request; shared by the threads working for it."""
+
+    __slots__ = ("queries", "seconds", "_lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.queries += 1
+            self.seconds += seconds
+
+
+# Set by MetricsMiddleware; Database.run and the write queue carry it to their threads
+current_request_db = contextvars.ContextVar("current_request_db", default=None)
+
+
+def instrument_engine(engine, slow_query_ms=0):
+    """
+    Time every statement on `engine`: global counters and histograms by
+    statement type, the current request's totals, and with `slow_query_ms`
+    > 0 a "[SQL] Slow query" line with the statement and its parameters.
+    """
+    slow_seconds = slow_query_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERIES.inc(statement=kind)
+        DB_QUERY_SECONDS.observe(elapsed, statement=kind)
+        request_db = current_request_db.get()
+        if request_db is not None:
+            request_db.add(elapsed)
+        if slow_seconds and elapsed >= slow_seconds:
+            DB_SLOW_QUERIES.inc()
+            params = repr(parameters)
+            if len(params) > 500:
+                params = params[:500] + "..."
+            print(f"[SQL] Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())} | params: {params}")
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(exception_context):
+        # after_cursor_execute doesn't fire for a failed statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+class MetricsMiddleware:
+    """
+    Records per-route request counts and latency, requests in flight, and
+    the SQL statements and time spent on behalf of each request.
+
+    Routes are labelled by their path template (/workstations/{ws_id}/edit),
+    so ids don't create new series; anything no API route matched, such as
+    static files and 404s, is labelled "other". Latency runs until the
+    last body chunk is sent, so streamed exports count in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        request_db = RequestDB()
+        token = current_request_db.set(request_db)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            current_request_db.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "other"
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+            HTTP_LATENCY.observe(elapsed, method=scope["method"], route=route)
+            REQUEST_QUERIES.observe(request_db.queries, route=route)
+            REQUEST_DB_SECONDS.observe(request_db.seconds, route=route)
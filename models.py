@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -26,5 +26,28 @@ class Workstation(Base):
     # New fields for Automate tracking
     updated_in_automate = Column(Boolean, default=False)
     completed_at = Column(DateTime, nullable=True)
+
+    # Fingerprint of the source row from the last CSV import (merge mode)
+    source_hash = Column(Integer, nullable=True)
     
     client = relationship('Client', back_populates='workstations')
+
+    # Keep in sync with the index migration in updatedb.py
+    __table_args__ = (
+        Index('ux_workstations_client_computer', 'client_id', 'computer_name', unique=True),
+        Index('ix_workstations_status_automate', 'status', 'updated_in_automate'),
+        Index('ix_workstations_automate', 'updated_in_automate'),
+        Index('ix_workstations_technician_status', 'technician', 'status'),
+        Index('ix_workstations_ram_gb', 'ram_gb'),
+    )
+
+
+class ProjectTicket(Base):
+    """ConnectWise project ticket created for a client, so bulk runs can skip it."""
+    __tablename__ = 'project_tickets'
+    id = Column(Integer, primary_key=True)
+    # By name: replace imports recreate clients with new ids
+    client_name = Column(String, unique=True, nullable=False)
+    ticket_id = Column(Integer, nullable=False)
+    cw_company_id = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,170 @@
+from sqlalchemy import or_, and_, case, func, select
+from models import Client, Workstation, ProjectTicket
+from search import fts_available, fts_match_expression, fts_ranked_matches
+
+
+def filter_workstations(query, client="", ram="", technician="", status="", search="", automate=""):
+    """
+    Apply the dashboard's filter parameters to a Workstation query.
+
+    Works on both ORM `Query` objects and `select()` statements. Exact
+    matches are used for the dropdown filters so they can use the
+    workstation indexes; free text goes through search_workstations.
+    """
+    if client:
+        query = query.join(Client, Workstation.client_id == Client.id).filter(Client.name == client)
+    if ram:
+        query = query.filter(Workstation.ram_gb == ram)
+    if technician:
+        query = query.filter(Workstation.technician == technician)
+    if status:
+        query = query.filter(Workstation.status == status)
+    if automate:
+        if automate == "updated":
+            query = query.filter(Workstation.updated_in_automate == True)
+        elif automate == "not-updated":
+            query = query.filter(Workstation.updated_in_automate == False)
+    if search:
+        query = search_workstations(query, search)
+    return query
+
+
+def search_workstations(query, search):
+    """
+    Restrict a Workstation query to rows matching free text in computer name,
+    processor, disk space, notes or client name.
+
+    Uses the FTS5 index (every word matched as a prefix, best rank first)
+    when available, otherwise case-insensitive LIKE substring matching.
+    """
+    if fts_available() and fts_match_expression(search):
+        matches = fts_ranked_matches(search)
+        return query.join(matches, matches.c.id == Workstation.id).order_by(matches.c.rank)
+    like = f"%{search}%"
+    return query.filter(
+        or_(
+            Workstation.computer_name.ilike(like),
+            Workstation.processor_name.ilike(like),
+            Workstation.diskspace_remaining_gb.ilike(like),
+            Workstation.notes.ilike(like),
+            Workstation.client.has(Client.name.ilike(like)),
+        )
+    )
+
+
+def not_ready_for_ticket():
+    """SQL form of connectwise_api.check_company_workstations_ready for a single row."""
+    return or_(
+        Workstation.status.is_(None),
+        Workstation.status.in_(["", "- Select Status -"]),
+        Workstation.technician.is_(None),
+        Workstation.technician == "",
+    )
+
+
+def client_group_summaries(db, **filters):
+    """
+    One row per client with matching workstations: counts and the ticket
+    readiness flag, computed with a single grouped query instead of loading
+    the workstations themselves.
+    """
+    stmt = select(
+        Workstation.client_id,
+        func.count(Workstation.id),
+        func.sum(case((Workstation.status == "Ready to Upgrade", 1), else_=0)),
+        func.sum(case((Workstation.status == "Completed", 1), else_=0)),
+        func.sum(case((not_ready_for_ticket(), 1), else_=0)),
+    ).group_by(Workstation.client_id)
+    stmt = filter_workstations(stmt, **filters).order_by(None)
+    names = dict(db.execute(select(Client.id, Client.name)).all())
+    groups = [
+        {
+            "id": client_id or 0,
+            "name": names.get(client_id, "Unknown"),
+            "total": total,
+            "ready_count": ready,
+            "completed_count": completed,
+            "ready_for_ticket": total > 0 and not not_ready,
+            "workstations": [],
+        }
+        for client_id, total, ready, completed, not_ready in db.execute(stmt)
+    ]
+    groups.sort(key=lambda g: g["name"])
+    return groups
+
+
+def ready_clients_without_ticket(db):
+    """
+    (id, name) of every client whose workstations all pass
+    check_company_workstations_ready and that has no recorded project
+    ticket, by name.
+    """
+    stmt = (
+        select(Client.id, Client.name)
+        .join(Workstation, Workstation.client_id == Client.id)
+        .where(Client.name.not_in(select(ProjectTicket.client_name)))
+        .group_by(Client.id)
+        .having(func.sum(case((not_ready_for_ticket(), 1), else_=0)) == 0)
+        .order_by(Client.name)
+    )
+    return [(client_id, name) for client_id, name in db.execute(stmt)]
+
+
+def client_summary(db, client_id):
+    """Unfiltered counts and ticket readiness for one client's group header."""
+    return client_summaries(db, [client_id])[0]
+
+
+def client_summaries(db, client_ids):
+    """client_summary for several clients with one grouped query, in the given order."""
+    client_ids = list(dict.fromkeys(client_id or None for client_id in client_ids))
+    known = [client_id for client_id in client_ids if client_id is not None]
+    conditions = [Workstation.client_id.in_(known)] if known else []
+    if None in client_ids:
+        conditions.append(Workstation.client_id.is_(None))
+    stmt = select(
+        Workstation.client_id,
+        func.count(Workstation.id),
+        func.sum(case((Workstation.status == "Ready to Upgrade", 1), else_=0)),
+        func.sum(case((Workstation.status == "Completed", 1), else_=0)),
+        func.sum(case((not_ready_for_ticket(), 1), else_=0)),
+    ).where(or_(*conditions)).group_by(Workstation.client_id)
+    counts = {client_id: row for client_id, *row in db.execute(stmt)} if conditions else {}
+    summaries = []
+    for client_id in client_ids:
+        total, ready, completed, not_ready = counts.get(client_id, (0, 0, 0, 0))
+        summaries.append({
+            "id": client_id or 0,
+            "total": total,
+            "ready_count": ready or 0,
+            "completed_count": completed or 0,
+            "ready_for_ticket": total > 0 and not not_ready,
+        })
+    return summaries
+
+
+def client_rows_page(db, client_id, after_name=None, after_id=None, limit=200, **filters):
+    """
+    One page of a client's workstations ordered by (computer_name, id), using
+    keyset pagination from the (after_name, after_id) cursor. Returns the rows
+    and the cursor for the next page (None on the last page).
+    """
+    query = db.query(Workstation)
+    if client_id:
+        query = query.filter(Workstation.client_id == client_id)
+    else:
+        query = query.filter(Workstation.client_id.is_(None))
+    query = filter_workstations(query, **filters).order_by(None)
+    if after_id is not None:
+        query = query.filter(
+            or_(
+                Workstation.computer_name > after_name,
+                and_(Workstation.computer_name == after_name, Workstation.id > after_id),
+            )
+        )
+    rows = query.order_by(Workstation.computer_name, Workstation.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = {"name": rows[-1].computer_name, "id": rows[-1].id}
+    return rows, next_cursor
@@ -0,0 +1,289 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from sqlalchemy import case, select, update
+from models import Client, Workstation, ProjectTicket
+from queries import filter_workstations, ready_clients_without_ticket
+from writes import WriteQueue
+
+EDITABLE_FIELDS = ("status", "technician", "notes", "updated_in_automate")
+_END = object()
+
+
+class Database:
+    """
+    Awaitable access to the synchronous SQLAlchemy sessions.
+
+    Reads run on a dedicated, bounded thread pool with their own session,
+    so async routes never block the event loop that also serves the
+    WebSockets, and the number of threads touching SQLite at once is capped
+    at `max_workers`. Writes go through a single-writer WriteQueue that
+    group-commits them.
+    """
+
+    def __init__(self, session_factory, max_workers=4, writer=None):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self.writer = writer or WriteQueue(session_factory)
+
+    async def run(self, fn, *args, **kwargs):
+        """Await fn(db, *args, **kwargs) run in a fresh session on the DB pool."""
+        return await self.run_sync(self._with_session, fn, *args, **kwargs)
+
+    async def write(self, fn, *args, **kwargs):
+        """Await fn(db, *args, **kwargs) run by the writer; fn must not commit."""
+        return await asyncio.wrap_future(self.writer.submit(fn, *args, **kwargs))
+
+    async def run_sync(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) on the DB pool (for code that opens its own sessions)."""
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (e.g. per-request SQL accounting) to the pool thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, partial(context.run, fn, *args, **kwargs))
+
+    async def iterate(self, iterator):
+        """Drive a blocking iterator (e.g. an export) on the DB pool, one item at a time."""
+        try:
+            while True:
+                item = await self.run_sync(next, iterator, _END)
+                if item is _END:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                await self.run_sync(close)
+
+    def _with_session(self, fn, *args, **kwargs):
+        db = self.session_factory()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    def stats(self):
+        return {"read_workers": self.max_workers, "writes": self.writer.stats()}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.writer.shutdown()
+
+
+def workstation_data(ws):
+    """Plain dict of a workstation, safe to use after its session is closed."""
+    return {
+        "id": ws.id,
+        "client_id": ws.client_id or 0,
+        "computer_name": ws.computer_name,
+        "processor_name": ws.processor_name,
+        "ram_gb": ws.ram_gb,
+        "diskspace_remaining_gb": ws.diskspace_remaining_gb,
+        "status": ws.status,
+        "technician": ws.technician,
+        "notes": ws.notes,
+        "updated_in_automate": bool(ws.updated_in_automate),
+        "completed_at": ws.completed_at.isoformat() if ws.completed_at else None,
+    }
+
+
+def _state(ws):
+    return (ws.status, ws.updated_in_automate)
+
+
+def _set_status(ws, status):
+    # Track if status changed to completed
+    if ws.status != "Completed" and status == "Completed":
+        ws.completed_at = datetime.utcnow()
+    elif ws.status == "Completed" and status != "Completed":
+        # If changing from completed to something else, reset the automate checkbox
+        ws.updated_in_automate = False
+        ws.completed_at = None
+
+
+# Write jobs for Database.write: they flush but never commit (the writer does)
+
+def _add_workstation(db, **fields):
+    # source_hash stays NULL: the row has no import source yet, so the next
+    # merge that contains this machine always updates it
+    ws = Workstation(updated_in_automate=False, **fields)
+    db.add(ws)
+    db.flush()
+    return workstation_data(ws)
+
+
+def _edit_workstation(db, ws_id, status, **fields):
+    ws = db.query(Workstation).filter_by(id=ws_id).first()
+    if not ws:
+        return None
+    before = _state(ws)
+    _set_status(ws, status)
+    ws.status = status
+    for field, value in fields.items():
+        setattr(ws, field, value)
+    db.flush()
+    return before, workstation_data(ws)
+
+
+def _delete_workstation(db, ws_id):
+    ws = db.query(Workstation).filter_by(id=ws_id).first()
+    if not ws:
+        return None
+    before = _state(ws)
+    row = workstation_data(ws)
+    db.delete(ws)
+    return before, row
+
+
+def parse_bool(value):
+    return str(value).lower() in ['true', '1', 'yes']
+
+
+def _apply_field(ws, field, value):
+    # Handle status changes
+    if field == "status":
+        _set_status(ws, value)
+    # Handle automate checkbox
+    if field == "updated_in_automate":
+        ws.updated_in_automate = parse_bool(value)
+    else:
+        setattr(ws, field, value)
+
+
+def _update_field(db, ws_id, field, value):
+    ws = db.query(Workstation).filter_by(id=ws_id).first()
+    if not ws:
+        return None
+    before = _state(ws)
+    _apply_field(ws, field, value)
+    db.flush()
+    return before, workstation_data(ws)
+
+
+def _update_fields(db, changes):
+    """
+    Apply (id, field, value) changes in order; a row changed several times
+    reports its state from before the first change. Returns
+    ({id: (before, row)}, missing ids).
+    """
+    ids = {ws_id for ws_id, _, _ in changes}
+    found = {ws.id: ws for ws in db.query(Workstation).filter(Workstation.id.in_(ids))}
+    befores = {}
+    for ws_id, field, value in changes:
+        ws = found.get(ws_id)
+        if ws is None:
+            continue
+        befores.setdefault(ws_id, _state(ws))
+        _apply_field(ws, field, value)
+    db.flush()
+    results = {ws_id: (before, workstation_data(found[ws_id])) for ws_id, before in befores.items()}
+    return results, sorted(ids - set(found))
+
+
+def bulk_field_values(field, value, now=None):
+    """
+    SET clause for changing `field` on many rows in one UPDATE, with the
+    same transitions _set_status applies row by row (evaluated against each
+    row's old status).
+    """
+    if field == "updated_in_automate":
+        return {"updated_in_automate": parse_bool(value)}
+    values = {field: value}
+    if field == "status":
+        was_completed = Workstation.status == "Completed"
+        if value == "Completed":
+            values["completed_at"] = case((was_completed, Workstation.completed_at), else_=now or datetime.utcnow())
+        else:
+            values["updated_in_automate"] = case((was_completed, False), else_=Workstation.updated_in_automate)
+            values["completed_at"] = case((was_completed, None), else_=Workstation.completed_at)
+    return values
+
+
+def _bulk_update(db, filters, field, value):
+    """One set-based UPDATE of every row matching the dashboard filters; returns [(id, client_id)]."""
+    matching = filter_workstations(select(Workstation.id), **filters).order_by(None)
+    stmt = (
+        update(Workstation)
+        .where(Workstation.id.in_(matching))
+        .values(bulk_field_values(field, value))
+        .returning(Workstation.id, Workstation.client_id)
+        .execution_options(synchronize_session=False)
+    )
+    return [(ws_id, client_id) for ws_id, client_id in db.execute(stmt)]
+
+
+def _client_workstations(db, client_id):
+    client = db.query(Client).filter_by(id=client_id).first()
+    workstations = db.query(Workstation).filter_by(client_id=client_id).all()
+    return (client.name if client else None), [workstation_data(ws) for ws in workstations]
+
+
+def _project_ticket(db, client_name):
+    ticket = db.query(ProjectTicket).filter_by(client_name=client_name).first()
+    return ticket.ticket_id if ticket else None
+
+
+def _record_project_ticket(db, client_name, ticket_id, cw_company_id):
+    ticket = db.query(ProjectTicket).filter_by(client_name=client_name).first()
+    if ticket is None:
+        ticket = ProjectTicket(client_name=client_name)
+        db.add(ticket)
+    ticket.ticket_id = ticket_id
+    ticket.cw_company_id = cw_company_id
+    ticket.created_at = datetime.utcnow()
+    db.flush()
+
+
+class WorkstationRepository:
+    """
+    Awaitable workstation reads and writes for the async routes.
+
+    Methods return plain dicts (see workstation_data) rather than ORM objects,
+    since the session is closed by the time the caller sees the result. Write
+    methods also return the (status, updated_in_automate) state from before
+    the change, for StatsService.apply.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    async def add(self, **fields):
+        """Insert a workstation; IntegrityError propagates on a duplicate name."""
+        return await self.database.write(_add_workstation, **fields)
+
+    async def edit(self, ws_id, **fields):
+        """(before, row) after updating every field, or None if not found."""
+        return await self.database.write(_edit_workstation, ws_id, **fields)
+
+    async def delete(self, ws_id):
+        """(before, deleted row), or None if not found."""
+        return await self.database.write(_delete_workstation, ws_id)
+
+    async def update_field(self, ws_id, field, value):
+        """(before, row) after an inline edit of one EDITABLE_FIELDS field, or None if not found."""
+        return await self.database.write(_update_field, ws_id, field, value)
+
+    async def update_fields(self, changes):
+        """Apply a list of (id, field, value) in one transaction; see _update_fields."""
+        return await self.database.write(_update_fields, changes)
+
+    async def bulk_update(self, filters, field, value):
+        """Set `field` on every row matching the dashboard filters; [(id, client_id)] changed."""
+        return await self.database.write(_bulk_update, filters, field, value)
+
+    async def project_ticket(self, client_name):
+        """ConnectWise ticket id recorded for a client, or None."""
+        return await self.database.run(_project_ticket, client_name)
+
+    async def record_project_ticket(self, client_name, ticket_id, cw_company_id=None):
+        await self.database.write(_record_project_ticket, client_name, ticket_id, cw_company_id)
+
+    async def ready_clients_without_ticket(self):
+        """[(id, name)] of clients ready for a project ticket that don't have one yet."""
+        return await self.database.run(ready_clients_without_ticket)
+
+    async def client_workstations(self, client_id):
+        """(client name or None, list of workstation dicts) for one client."""
+        return await self.database.run(_client_workstations, client_id)
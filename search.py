@@ -0,0 +1,89 @@
+import re
+from sqlalchemy import text, Integer, Float
+from sqlalchemy.exc import OperationalError
+
+FTS_TABLE = "workstations_fts"
+FTS_COLUMNS = "computer_name, processor_name, diskspace_remaining_gb, notes, client_name"
+_NEW_ROW = (
+    "new.id, new.computer_name, new.processor_name, new.diskspace_remaining_gb, new.notes, "
+    "(SELECT name FROM clients WHERE id = new.client_id)"
+)
+
+# Standalone FTS5 index (rowid = workstations.id) kept in sync by triggers,
+# so every write path -- ORM, Core bulk inserts, raw SQL -- updates it.
+FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({FTS_COLUMNS}, tokenize='unicode61')",
+    f"""CREATE TRIGGER IF NOT EXISTS workstations_fts_ai AFTER INSERT ON workstations BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES ({_NEW_ROW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS workstations_fts_ad AFTER DELETE ON workstations BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS workstations_fts_au
+        AFTER UPDATE OF computer_name, processor_name, diskspace_remaining_gb, notes, client_id ON workstations
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES ({_NEW_ROW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE OF name ON clients BEGIN
+        UPDATE {FTS_TABLE} SET client_name = new.name
+        WHERE rowid IN (SELECT id FROM workstations WHERE client_id = new.id);
+    END""",
+]
+
+FTS_REBUILD = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        SELECT w.id, w.computer_name, w.processor_name, w.diskspace_remaining_gb, w.notes, c.name
+        FROM workstations w LEFT JOIN clients c ON c.id = w.client_id""",
+]
+
+_fts_available = False
+
+
+def fts_available():
+    return _fts_available
+
+
+def ensure_fts(engine):
+    """
+    Create the FTS5 index and its triggers if missing (building it from the
+    existing rows). Returns False, leaving search on LIKE, when this SQLite
+    build has no FTS5.
+    """
+    global _fts_available
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:name"), {"name": FTS_TABLE}
+            ).first()
+            for statement in FTS_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                for statement in FTS_REBUILD:
+                    conn.execute(text(statement))
+    except OperationalError as e:
+        print(f"[SEARCH] FTS5 unavailable, falling back to LIKE search: {e}")
+        _fts_available = False
+        return False
+    _fts_available = True
+    return True
+
+
+def fts_match_expression(term):
+    """
+    Turn free text into an FTS5 query: every word must match as a prefix.
+    "i5 75" -> '"i5"* AND "75"*'. Returns "" when there is nothing to match.
+    """
+    tokens = re.findall(r"\w+", term.lower())
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def fts_ranked_matches(term):
+    """Subquery of (id, rank) for workstations matching `term`, best matches first by rank."""
+    return (
+        text(f"SELECT rowid AS id, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query")
+        .bindparams(fts_query=fts_match_expression(term))
+        .columns(id=Integer, rank=Float)
+        .subquery("search_matches")
+    )
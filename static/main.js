@@ -88,32 +88,362 @@ function updateAutomateStatus(id, checked) {
       });
 }
 
+// Set one field on every workstation the current filters show. The paginated
+// view is filtered by the server, so it sends the filters and the server runs
+// one UPDATE; the full view filters in the browser (partial matches), so it
+// sends the ids of the visible rows as one batch.
+function bulkApply() {
+    const field = document.getElementById('bulkField').value;
+    const value = field === 'updated_in_automate'
+        ? String(document.getElementById('bulkAutomate').checked)
+        : document.getElementById('bulkValue').value.trim();
+    let request;
+    if (isPaged()) {
+        const filters = getServerFilters();
+        if (!Object.values(filters).some(v => v)) return alert('Set a filter first.');
+        if (!confirm(`Set ${field} to "${value}" on every workstation matching the filters?`)) return;
+        request = fetch('/update/bulk', {
+            method: 'POST',
+            body: new URLSearchParams({ ...filters, field, value })
+        });
+    } else {
+        if (!filtersActive()) return alert('Set a filter first.');
+        const ids = Array.from(document.querySelectorAll('tr[data-wsid]'))
+            .filter(row => row.style.display !== 'none' && row.closest('.client-group').style.display !== 'none')
+            .map(row => parseInt(row.dataset.wsid, 10));
+        if (!ids.length) return;
+        if (!confirm(`Set ${field} to "${value}" on ${ids.length} workstations?`)) return;
+        request = fetch('/update/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ changes: ids.map(id => ({ id, field, value })) })
+        });
+    }
+    // The change itself arrives over the WebSocket like any other edit
+    request.then(res => res.json())
+        .then(data => {
+            if (!data.ok) alert(`Bulk update failed: ${data.error || data.detail}`);
+        });
+}
+
+function setupBulkApply() {
+    const field = document.getElementById('bulkField');
+    if (!field) return;
+    const value = document.getElementById('bulkValue');
+    const automate = document.getElementById('bulkAutomateLabel');
+    const sync = () => {
+        value.setAttribute('list', field.value === 'technician' ? 'bulkTechnicianList' : 'bulkStatusList');
+        value.style.display = field.value === 'updated_in_automate' ? 'none' : '';
+        automate.style.display = field.value === 'updated_in_automate' ? '' : 'none';
+        if (field.value === 'notes') value.removeAttribute('list');
+    };
+    field.addEventListener('change', sync);
+    sync();
+    document.getElementById('bulkApply').addEventListener('click', bulkApply);
+}
+
 // --- WebSocket setup for real-time updates ---
-const wsProtocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
-const socket = new WebSocket(wsProtocol + '://' + window.location.host + '/ws');
+// Data changes arrive as numbered deltas. lastSeq is the last one applied to
+// the page; a gap (or a reconnect) is filled from /changes?since=lastSeq.
+let lastSeq = 0;
+let seenSeq = 0;
+let dataEpoch = '';
+let catchingUp = false;
+let socket = null;
+let reconnectDelay = 1000;
 
-socket.addEventListener('message', function(event) {
-    try {
-        const data = JSON.parse(event.data);
-        if (data.action === 'field_update') {
-            applyFieldUpdate(data.id, data.field, data.value);
-            checkProjectTicketReadiness();
-            if (data.stats) updateStats(data.stats);
-        } else if (data.action === 'refresh') {
-            refreshDashboard();
+function connectSocket() {
+    const wsProtocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    socket = new WebSocket(wsProtocol + '://' + window.location.host + '/ws');
+    socket.addEventListener('open', function() {
+        reconnectDelay = 1000;
+        catchUp();
+    });
+    socket.addEventListener('message', function(event) {
+        try {
+            const data = JSON.parse(event.data);
+            if (data.action === 'batch') {
+                handleBatch(data);
+            } else {
+                handleMessage(data);
+            }
+        } catch (e) {
+            console.error('Bad WS message', e);
         }
-    } catch (e) {
-        console.error('Bad WS message', e);
+    });
+    socket.addEventListener('close', function() {
+        setTimeout(connectSocket, reconnectDelay);
+        reconnectDelay = Math.min(reconnectDelay * 2, 30000);
+    });
+}
+
+// Take the seq the current dashboard HTML was rendered at
+function syncSeqFromPage() {
+    const groups = document.getElementById('clientGroups');
+    if (!groups) return;
+    lastSeq = parseInt(groups.dataset.seq || '0', 10);
+    dataEpoch = groups.dataset.epoch || '';
+}
+
+function handleMessage(data) {
+    if (data.action === 'import_job') {
+        showImportProgress(data);
+    } else if (data.action === 'ticket_job') {
+        showTicketProgress(data);
+    } else if (data.seq) {
+        handleChange(data);
     }
-});
+}
 
-function refreshDashboard() {
-    const filters = getFilters();
-    const q = Object.entries(filters)
-        .filter(([k,v]) => v)
-        .map(([k,v]) => `${encodeURIComponent(k)}=${encodeURIComponent(v)}`)
+// Several coalesced messages. Superseded changes were left out, so the
+// batch covers from_seq..seq even though some seqs in between are missing.
+function handleBatch(batch) {
+    const changes = batch.changes.filter(c => c.seq);
+    batch.changes.filter(c => !c.seq).forEach(handleMessage);
+    if (!changes.length) return;
+    seenSeq = Math.max(seenSeq, batch.seq);
+    if (batch.seq <= lastSeq) return;
+    if (batch.from_seq > lastSeq + 1) return catchUp();
+    changes.forEach(change => {
+        if (change.seq > lastSeq) applyChange(change);
+    });
+    lastSeq = batch.seq;
+}
+
+function handleChange(change) {
+    seenSeq = Math.max(seenSeq, change.seq);
+    if (change.seq <= lastSeq) return;
+    if (change.seq > lastSeq + 1) return catchUp();
+    applyChange(change);
+    lastSeq = change.seq;
+}
+
+function catchUp() {
+    if (catchingUp) return;
+    catchingUp = true;
+    fetch('/changes?' + toQuery({ since: lastSeq, epoch: dataEpoch }))
+        .then(res => res.json())
+        .then(data => {
+            if (data.reset) return refreshDashboard();
+            data.changes.forEach(change => {
+                if (change.seq > lastSeq) {
+                    applyChange(change);
+                    lastSeq = change.seq;
+                }
+            });
+            updateStats(data.stats);
+        })
+        .catch(err => console.error('Catch-up failed', err))
+        .finally(() => {
+            catchingUp = false;
+        });
+}
+
+function applyChange(change) {
+    if (change.action === 'field_update') {
+        applyFieldUpdate(change.id, change.field, change.value);
+    } else if (change.action === 'row_added' || change.action === 'row_updated') {
+        upsertRow(change);
+    } else if (change.action === 'row_removed') {
+        const row = document.querySelector(`tr[data-wsid="${change.row.id}"]`);
+        if (row) row.remove();
+    } else if (change.action === 'fields_updated') {
+        change.updates.forEach(u => applyFieldUpdate(u.id, u.field, u.value));
+        if (!isPaged() && filtersActive()) filterTable();
+    } else if (change.action === 'bulk_update') {
+        change.ids.forEach(id => applyFieldUpdate(id, change.field, change.value));
+        if (!isPaged() && filtersActive()) filterTable();
+    } else if (change.action === 'refresh') {
+        refreshDashboard();
+        return;
+    }
+    (change.clients || [change.client]).forEach(updateClientHeader);
+    if (change.stats) updateStats(change.stats);
+    checkProjectTicketReadiness();
+}
+
+function upsertRow(change) {
+    const data = change.row;
+    const existing = document.querySelector(`tr[data-wsid="${data.id}"]`);
+    const group = document.querySelector(`.client-group[data-client-id="${data.client_id}"]`);
+    if (!group) {
+        // A client the page doesn't show yet (paginated groups may just be filtered out)
+        if (!isPaged()) refreshDashboard();
+        return;
+    }
+    const tmp = document.createElement('tbody');
+    tmp.innerHTML = change.html.trim();
+    const row = tmp.firstElementChild;
+    const groupName = group.querySelector('.client-header strong').textContent.toLowerCase();
+    if (isPaged() && !rowMatchesFilters(row, groupName, getFilters())) {
+        if (existing) existing.remove();
+        return;
+    }
+    if (existing) {
+        existing.replaceWith(row);
+    } else {
+        insertRowSorted(group.querySelector('table'), row, data.computer_name);
+    }
+    setupDeleteForms();
+    if (!isPaged() && filtersActive()) filterTable();
+}
+
+// Insert a new row at its computer-name position among the loaded rows
+function insertRowSorted(table, row, name) {
+    // Unloaded paginated tables fetch it on expand
+    if (table.dataset.loaded === '0' || table.dataset.loaded === 'loading') return;
+    const key = name.toLowerCase();
+    const next = Array.from(table.querySelectorAll('tr[data-wsid]'))
+        .find(r => r.cells[0].textContent.trim().toLowerCase() > key);
+    if (next) {
+        next.before(row);
+    } else if (!table.querySelector('.load-more-row')) {
+        (table.tBodies[0] || table).appendChild(row);
+    }
+    // Otherwise it sorts after the loaded page and comes with "Load more"
+}
+
+function updateClientHeader(client) {
+    if (!client) return;
+    const group = document.querySelector(`.client-group[data-client-id="${client.id}"]`);
+    if (!group) return;
+    // Paginated headers count only the rows matching the server filters
+    if (isPaged() && Object.values(getServerFilters()).some(v => v)) return;
+    const header = group.querySelector('.client-header');
+    const total = header.querySelector('.client-total');
+    if (total) total.textContent = `(${client.total} systems)`;
+    const completed = client.total > 0 && client.completed_count === client.total;
+    header.classList.toggle('completed-company', completed);
+    header.classList.toggle('ready-company', !completed && client.ready_count > 0);
+    if (client.total === 0) group.style.display = 'none';
+    const table = group.querySelector('table');
+    if (table && table.dataset.loaded && table.dataset.loaded !== 'all') {
+        setProjectTicketButton(header, client.id, client.ready_for_ticket);
+    }
+}
+
+function showImportProgress(job) {
+    const el = document.getElementById('importProgress');
+    if (!el) return;
+    const p = job.progress || {};
+    const name = job.filename || 'CSV';
+    el.style.display = '';
+    el.innerHTML = '';
+    if (job.status === 'queued') {
+        el.textContent = `Import of ${name} queued...`;
+    } else if (job.status === 'running') {
+        el.textContent = `Importing ${name}: ${p.rows_parsed || 0} rows parsed, ${p.rows_inserted || 0} inserted, ${p.rows_updated || 0} updated... `;
+    } else if (job.status === 'completed') {
+        el.textContent = `Imported ${name} in ${p.seconds}s: ${p.rows_inserted} inserted, ${p.rows_updated} updated, ${p.rows_unchanged} unchanged, ${p.rows_deleted} deleted.`;
+        if (p.duplicates) {
+            el.textContent += ` ${p.duplicates} duplicate row${p.duplicates === 1 ? ' was' : 's were'} skipped (same client and computer name as an earlier row).`;
+        }
+    } else if (job.status === 'cancelled') {
+        el.textContent = `Import of ${name} was cancelled; no data was changed.`;
+    } else if (job.status === 'failed') {
+        el.textContent = `Import of ${name} failed: ${job.error}`;
+    }
+    if (job.status === 'queued' || job.status === 'running') {
+        const cancel = document.createElement('button');
+        cancel.type = 'button';
+        cancel.className = 'import-btn';
+        cancel.innerText = 'Cancel';
+        cancel.onclick = () => fetch(`/import/jobs/${job.id}/cancel`, { method: 'POST' });
+        el.appendChild(cancel);
+    }
+}
+
+function showTicketProgress(job) {
+    const el = document.getElementById('ticketProgress');
+    if (!el) return;
+    const p = job.progress || {};
+    const r = job.result;
+    if (r && r.status === 'created') {
+        const btn = document.querySelector(`.client-group[data-client-id="${r.client_id}"] .project-ticket-btn`);
+        if (btn) btn.style.display = 'none';
+    }
+    el.style.display = '';
+    el.innerHTML = '';
+    const counts = `${p.created} created, ${p.skipped} skipped, ${p.failed} failed`;
+    if (job.status === 'running' || job.status === 'queued') {
+        el.textContent = `Creating tickets: ${p.done} of ${p.total} clients (${counts})` +
+            (r ? ` — ${r.client_name}: ${r.status === 'created' ? 'ticket #' + r.ticket_id : r.error}` : '') + ' ';
+        const cancel = document.createElement('button');
+        cancel.type = 'button';
+        cancel.className = 'import-btn';
+        cancel.innerText = 'Cancel';
+        cancel.onclick = () => fetch(`/ticket-jobs/${job.id}/cancel`, { method: 'POST' });
+        el.appendChild(cancel);
+    } else if (job.status === 'failed') {
+        el.textContent = `Ticket run failed: ${job.error}`;
+    } else {
+        el.textContent = `Ticket run ${job.status}: ${counts} of ${p.total} clients.`;
+    }
+}
+
+function setupBulkTickets() {
+    const btn = document.getElementById('createAllTickets');
+    if (!btn) return;
+    btn.addEventListener('click', function() {
+        if (!confirm('Create ConnectWise project tickets for every ready client without one?')) return;
+        fetch('/create-project-tickets', { method: 'POST' })
+            .then(res => res.json())
+            .then(data => {
+                if (data.job) showTicketProgress(data.job);
+                if (!data.success) alert(data.error);
+            });
+    });
+}
+
+function setupImportForm() {
+    const form = document.querySelector('form.import-form');
+    if (!form) return;
+    form.addEventListener('submit', function(e) {
+        e.preventDefault();
+        fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: { 'X-Requested-With': 'XMLHttpRequest' }
+        }).then(res => res.json())
+          .then(data => {
+            if (data.job) showImportProgress(data.job);
+            else alert(`Import failed: ${data.detail}`);
+          });
+    });
+}
+
+function isPaged() {
+    const groups = document.getElementById('clientGroups');
+    return !!(groups && groups.dataset.paged);
+}
+
+// Raw filter values for server-side filtering (paginated mode)
+function getServerFilters() {
+    return {
+        client: document.getElementById('clientFilter').value.trim(),
+        ram: document.getElementById('ramFilter').value.trim(),
+        technician: document.getElementById('technicianFilter').value.trim(),
+        status: document.getElementById('statusFilter').value.trim(),
+        search: document.getElementById('textSearch').value.trim(),
+        automate: document.getElementById('automateFilter').value
+    };
+}
+
+function toQuery(params) {
+    return Object.entries(params)
+        .filter(([k, v]) => v !== '' && v !== null && v !== undefined)
+        .map(([k, v]) => `${encodeURIComponent(k)}=${encodeURIComponent(v)}`)
         .join('&');
-    fetch('/fragment?' + q)
+}
+
+function refreshDashboard() {
+    // The full view is filtered client-side, so fetch everything; the
+    // paginated view is filtered by the server.
+    const q = isPaged() ? toQuery({ ...getServerFilters(), paged: 1 }) : '';
+    const expanded = Array.from(document.querySelectorAll('.client-group'))
+        .filter(g => g.querySelector('.workstations').style.display !== 'none')
+        .map(g => g.dataset.clientId);
+    return fetch('/fragment?' + q)
         .then(res => res.text())
         .then(html => {
             const tmp = document.createElement('div');
@@ -126,17 +456,67 @@ function refreshDashboard() {
                 const oldList = document.querySelector(`#${id}`);
                 if (newList && oldList) oldList.innerHTML = newList.innerHTML;
             });
+            // Keep the selected automate filter, refresh its counts
+            const newAutomate = tmp.querySelector('#automateFilter');
+            const oldAutomate = document.getElementById('automateFilter');
+            if (newAutomate && oldAutomate) {
+                Array.from(newAutomate.options).forEach((opt, i) => {
+                    if (oldAutomate.options[i]) oldAutomate.options[i].textContent = opt.textContent;
+                });
+            }
             const newGroups = tmp.querySelector('#clientGroups');
             const oldGroups = document.getElementById('clientGroups');
         if (newGroups && oldGroups) {
             oldGroups.innerHTML = newGroups.innerHTML;
+            oldGroups.dataset.seq = newGroups.dataset.seq;
+            oldGroups.dataset.epoch = newGroups.dataset.epoch;
+        }
+        if (isPaged()) {
+            // Re-open the groups that were expanded before the refresh
+            expanded.forEach(clientId => {
+                const group = document.querySelector(`.client-group[data-client-id="${clientId}"]`);
+                if (group) group.querySelector('.client-header').click();
+            });
         }
         setupDeleteForms();
         setupSorting();
         checkProjectTicketReadiness();
         filterTable();
+        // Replay deltas that arrived while the fragment was being built
+        syncSeqFromPage();
+        if (lastSeq < seenSeq) catchUp();
     });
 }
+
+// Fetch one page of a client's rows (paginated mode) and append it to its table
+function loadClientRows(clientId, afterName, afterId) {
+    const group = document.querySelector(`.client-group[data-client-id="${clientId}"]`);
+    if (!group) return;
+    const table = group.querySelector('table');
+    const params = getServerFilters();
+    delete params.client;
+    if (afterId !== undefined) {
+        params.after_name = afterName;
+        params.after_id = afterId;
+    }
+    table.dataset.loaded = 'loading';
+    fetch(`/clients/${clientId}/rows?` + toQuery(params))
+        .then(res => res.text())
+        .then(html => {
+            const oldMore = table.querySelector('.load-more-row');
+            if (oldMore) oldMore.remove();
+            const body = table.tBodies[0] || table;
+            body.insertAdjacentHTML('beforeend', html);
+            table.dataset.loaded = table.querySelector('.load-more-row') ? 'partial' : 'all';
+            setupDeleteForms();
+            checkProjectTicketReadiness();
+        });
+}
+
+function loadMoreRows(btn) {
+    btn.disabled = true;
+    loadClientRows(btn.dataset.clientId, btn.dataset.afterName, btn.dataset.afterId);
+}
 
 function setRowCompleted(wsid, completed) {
     const row = document.querySelector('tr[data-wsid="' + wsid + '"]');
@@ -155,12 +535,14 @@ function setRowCompleted(wsid, completed) {
     }
 }
 
-function toggleClient(clientId) {
-    let el = document.getElementById('client-' + clientId);
-    let toggle = document.getElementById('toggle-' + clientId);
+function toggleClient(clientKey, clientId) {
+    let el = document.getElementById('client-' + clientKey);
+    let toggle = document.getElementById('toggle-' + clientKey);
     if (el.style.display === "none") {
         el.style.display = "";
         if (toggle) toggle.innerText = "[-]";
+        const table = el.querySelector('table');
+        if (table && table.dataset.loaded === '0') loadClientRows(clientId);
     } else {
         el.style.display = "none";
         if (toggle) toggle.innerText = "[+]";
@@ -179,16 +561,51 @@ function getFilters() {
     };
 }
 
+function applyFilters() {
+    if (isPaged()) refreshDashboard();
+    else filterTable();
+}
+
+function filtersActive() {
+    return Object.values(getFilters()).some(v => v);
+}
+
+function rowMatchesFilters(row, groupName, filters) {
+    let cells = row.cells;
+    let computer = cells[0].textContent.trim().toLowerCase();
+    let processor = cells[1].textContent.trim().toLowerCase();
+    let ram = cells[2].textContent.replace(/gb/i, "").trim().toLowerCase();
+    let disk = cells[3].textContent.replace(/gb/i, "").trim().toLowerCase();
+    let status = cells[4].querySelector('select').value.trim().toLowerCase();
+    let technician = cells[5].querySelector('select').value.trim().toLowerCase();
+    let notes = cells[6].querySelector('input').value.trim().toLowerCase();
+    let automateStatus = row.getAttribute('data-automate');
+
+    let show = true;
+    // Partial, case-insensitive matching for all filters
+    if (filters.client && !groupName.includes(filters.client)) show = false;
+    if (filters.ram && !ram.includes(filters.ram)) show = false;
+    if (filters.technician && !technician.includes(filters.technician)) show = false;
+    if (filters.status && !status.includes(filters.status)) show = false;
+    if (filters.automate && automateStatus !== filters.automate) show = false;
+    if (filters.search && !(
+        computer.includes(filters.search) ||
+        processor.includes(filters.search) ||
+        ram.includes(filters.search) ||
+        disk.includes(filters.search) ||
+        status.includes(filters.search) ||
+        technician.includes(filters.search) ||
+        notes.includes(filters.search) ||
+        groupName.includes(filters.search)
+    )) show = false;
+    return show;
+}
+
 function filterTable() {
+    // Paginated groups only hold the rows the server already filtered
+    if (isPaged()) return;
     let filters = getFilters();
-    let filteringActive = (
-        filters.client ||
-        filters.ram ||
-        filters.technician ||
-        filters.status ||
-        filters.search ||
-        filters.automate
-    );
+    let filteringActive = filtersActive();
 
     document.querySelectorAll('.client-group').forEach(group => {
         let groupName = group.querySelector('.client-header strong').textContent.toLowerCase();
@@ -196,34 +613,7 @@ function filterTable() {
         let table = group.querySelector('table');
         let rows = Array.from(table.querySelectorAll('tr')).slice(1); // skip header
         rows.forEach(row => {
-            let cells = row.cells;
-            let computer = cells[0].textContent.trim().toLowerCase();
-            let processor = cells[1].textContent.trim().toLowerCase();
-            let ram = cells[2].textContent.replace(/gb/i, "").trim().toLowerCase();
-            let disk = cells[3].textContent.replace(/gb/i, "").trim().toLowerCase();
-            let status = cells[4].querySelector('select').value.trim().toLowerCase();
-            let technician = cells[5].querySelector('select').value.trim().toLowerCase();
-            let notes = cells[6].querySelector('input').value.trim().toLowerCase();
-            let automateStatus = row.getAttribute('data-automate');
-
-            let show = true;
-            // Partial, case-insensitive matching for all filters
-            if (filters.client && !groupName.includes(filters.client)) show = false;
-            if (filters.ram && !ram.includes(filters.ram)) show = false;
-            if (filters.technician && !technician.includes(filters.technician)) show = false;
-            if (filters.status && !status.includes(filters.status)) show = false;
-            if (filters.automate && automateStatus !== filters.automate) show = false;
-            if (filters.search && !(
-                computer.includes(filters.search) ||
-                processor.includes(filters.search) ||
-                ram.includes(filters.search) ||
-                disk.includes(filters.search) ||
-                status.includes(filters.search) ||
-                technician.includes(filters.search) ||
-                notes.includes(filters.search) ||
-                groupName.includes(filters.search)
-            )) show = false;
-
+            let show = rowMatchesFilters(row, groupName, filters);
             row.style.display = show ? "" : "none";
             if (show) groupVisible = true;
         });
@@ -257,7 +647,7 @@ function setupClearXs() {
         if (inp && xBtn) {
             xBtn.onclick = function() {
                 inp.value = '';
-                filterTable();
+                applyFilters();
             };
             inp.addEventListener('input', function() {
                 xBtn.style.display = inp.value ? 'inline' : 'none';
@@ -286,7 +676,10 @@ function createProjectTicket(clientId, clientName) {
     .then(res => res.json())
     .then(data => {
         if (data.success) {
-            alert(`Project ticket #${data.ticket_id} created successfully for ${data.cw_company_name}!`);
+            const failed = (data.assignments || []).filter(a => !a.assigned)
+                .map(a => `\n  ${a.technician}: ${a.error}`).join('');
+            alert(`Project ticket #${data.ticket_id} created successfully for ${data.cw_company_name}!` +
+                (failed ? `\n\nCould not assign:${failed}` : ''));
             // Hide the button after successful creation
             btn.style.display = 'none';
         } else {
@@ -313,7 +706,11 @@ function checkProjectTicketReadiness() {
         if (!clientId) return;
         
         // Check all workstations in this client
-        const rows = group.querySelectorAll('table tr:not(:first-child)');
+        // Unloaded paginated groups keep the server's readiness flag
+        const table = group.querySelector('table');
+        if (table && table.dataset.loaded && table.dataset.loaded !== 'all') return;
+
+        const rows = group.querySelectorAll('table tr:not(:first-child):not(.load-more-row)');
         let allReady = rows.length > 0;
         
         rows.forEach(row => {
@@ -333,29 +730,33 @@ function checkProjectTicketReadiness() {
             }
         });
         
-        // Show/hide the project ticket button
-        let projectBtn = clientHeader.querySelector('.project-ticket-btn');
-        if (allReady && !projectBtn) {
-            // Add the button
-            const addBtn = clientHeader.querySelector('button[onclick*="showAddModal"]');
-            if (addBtn) {
-                const newBtn = document.createElement('button');
-                newBtn.className = 'import-btn project-ticket-btn';
-                newBtn.type = 'button';
-                newBtn.innerText = 'Create Project Ticket';
-                newBtn.onclick = (e) => {
-                    e.stopPropagation();
-                    const clientName = clientHeader.querySelector('strong').textContent;
-                    createProjectTicket(clientId, clientName);
-                };
-                addBtn.parentNode.insertBefore(newBtn, addBtn.nextSibling);
-                addBtn.parentNode.insertBefore(document.createTextNode(' '), addBtn.nextSibling);
-            }
-        } else if (!allReady && projectBtn) {
-            // Remove the button
-            projectBtn.remove();
-        }
+        setProjectTicketButton(clientHeader, clientId, allReady);
     });
+}
+
+// Show/hide the project ticket button
+function setProjectTicketButton(clientHeader, clientId, allReady) {
+    let projectBtn = clientHeader.querySelector('.project-ticket-btn');
+    if (allReady && !projectBtn) {
+        // Add the button
+        const addBtn = clientHeader.querySelector('button[onclick*="showAddModal"]');
+        if (addBtn) {
+            const newBtn = document.createElement('button');
+            newBtn.className = 'import-btn project-ticket-btn';
+            newBtn.type = 'button';
+            newBtn.innerText = 'Create Project Ticket';
+            newBtn.onclick = (e) => {
+                e.stopPropagation();
+                const clientName = clientHeader.querySelector('strong').textContent;
+                createProjectTicket(clientId, clientName);
+            };
+            addBtn.parentNode.insertBefore(newBtn, addBtn.nextSibling);
+            addBtn.parentNode.insertBefore(document.createTextNode(' '), addBtn.nextSibling);
+        }
+    } else if (!allReady && projectBtn) {
+        // Remove the button
+        projectBtn.remove();
+    }
 }
 
 function setupDeleteForms() {
@@ -368,7 +769,7 @@ function setupDeleteForms() {
             fetch(form.action, {
                 method: 'POST',
                 headers: { 'X-Requested-With': 'XMLHttpRequest' }
-            }).then(() => refreshDashboard());
+            }).then(() => catchUp());
         });
     });
 }
@@ -382,7 +783,11 @@ function setupAddEditForms() {
                 method: 'POST',
                 body: new FormData(addForm),
                 headers: { 'X-Requested-With': 'XMLHttpRequest' }
-            }).then(() => { closeModal('addModal'); refreshDashboard(); });
+            }).then(res => {
+                if (!res.ok) return res.json().then(data => alert(data.detail));
+                closeModal('addModal');
+                catchUp();
+            });
         });
     }
     const editForm = document.getElementById('editForm');
@@ -393,7 +798,11 @@ function setupAddEditForms() {
                 method: 'POST',
                 body: new FormData(editForm),
                 headers: { 'X-Requested-With': 'XMLHttpRequest' }
-            }).then(() => { closeModal('editModal'); refreshDashboard(); });
+            }).then(res => {
+                if (!res.ok) return res.json().then(data => alert(data.detail));
+                closeModal('editModal');
+                catchUp();
+            });
         });
     }
 }
@@ -433,20 +842,31 @@ function setupSorting() {
 }
 
 window.onload = function () {
-    // Set up instant filter listeners
+    // Set up instant filter listeners (server-side, debounced, when paginated)
+    let filterTimer = null;
+    const onFilterInput = () => {
+        if (!isPaged()) return filterTable();
+        clearTimeout(filterTimer);
+        filterTimer = setTimeout(refreshDashboard, 300);
+    };
     ['clientFilter', 'ramFilter', 'technicianFilter', 'statusFilter', 'textSearch', 'automateFilter'].forEach(id => {
         let el = document.getElementById(id);
         if (el) {
-            el.addEventListener(el.tagName === 'SELECT' ? 'change' : 'input', filterTable);
+            el.addEventListener(el.tagName === 'SELECT' ? 'change' : 'input', onFilterInput);
         }
     });
 
+    syncSeqFromPage();
+    connectSocket();
     setupClearXs();
     filterTable();
     checkProjectTicketReadiness();
     setupDeleteForms();
     setupAddEditForms();
+    setupImportForm();
     setupSorting();
+    setupBulkApply();
+    setupBulkTickets();
 
     let clearBtn = document.getElementById('clearFilters');
     if (clearBtn) {
@@ -456,23 +876,20 @@ window.onload = function () {
                 if (el) el.value = '';
             });
             document.getElementById('automateFilter').value = '';
-            filterTable();
+            applyFilters();
             setupClearXs();
         });
     }
 
-    // Export button: Export what is currently displayed (filters applied)
-    let exportBtn = document.getElementById('exportBtn');
-    if (exportBtn) {
-        exportBtn.addEventListener('click', function(e) {
-            let filters = getFilters();
-            let q = Object.entries(filters)
-                .filter(([k, v]) => v)
-                .map(([k, v]) => `${encodeURIComponent(k)}=${encodeURIComponent(v)}`)
-                .join('&');
-            exportBtn.href = '/export?' + q;
-        });
-    }
+    // Export buttons: Export what is currently displayed (filters applied)
+    [['exportBtn', 'csv'], ['exportXlsxBtn', 'xlsx'], ['exportParquetBtn', 'parquet']].forEach(([id, format]) => {
+        let exportBtn = document.getElementById(id);
+        if (exportBtn) {
+            exportBtn.addEventListener('click', function(e) {
+                exportBtn.href = '/export?' + toQuery({ ...getFilters(), format });
+            });
+        }
+    });
 };
 
 // ---- Modal logic for Add/Edit Workstation ----
@@ -0,0 +1,133 @@
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import func
+from models import Workstation
+
+NOT_STARTED_STATUSES = ("- Select Status -", "Assigned", "Pending Upgrade")
+
+
+class StatsService:
+    """
+    Dashboard counters kept in memory.
+
+    Counts are held per (status, updated_in_automate) pair, so a single edit
+    is an O(1) adjustment. One grouped aggregate query fills them initially,
+    after bulk changes (invalidate) and every `reconcile_seconds` to
+    correct any drift.
+
+    The query runs outside the lock, so its result is only kept if no
+    apply(), invalidate() or write (see `writing`) overlapped it; the
+    generation counter tracks those. Otherwise an edit could be counted
+    twice or dropped, or an import's invalidate() undone.
+    """
+
+    def __init__(self, session_factory, reconcile_seconds=300):
+        self.session_factory = session_factory
+        self.reconcile_seconds = reconcile_seconds
+        self._counts = None
+        self._computed_at = 0.0
+        self._generation = 0
+        self._writers = 0
+        self._lock = threading.Lock()
+
+    def recompute(self, db=None):
+        """Reload every counter with one GROUP BY query and return the stats."""
+        with self._lock:
+            generation = self._generation
+            writing = self._writers
+        own_session = db is None
+        db = db or self.session_factory()
+        try:
+            rows = (
+                db.query(Workstation.status, Workstation.updated_in_automate, func.count(Workstation.id))
+                .group_by(Workstation.status, Workstation.updated_in_automate)
+                .all()
+            )
+        finally:
+            if own_session:
+                db.close()
+        counts = Counter()
+        for status, automate, n in rows:
+            counts[(status, bool(automate))] += n
+        with self._lock:
+            # A change landed during the query: the counts may or may not include it
+            if not writing and generation == self._generation:
+                self._counts = counts
+                self._computed_at = time.monotonic()
+            return self._derive(counts)
+
+    def snapshot(self, db=None):
+        """Current stats; only touches the database when stale or invalidated."""
+        with self._lock:
+            fresh = (
+                self._counts is not None
+                and time.monotonic() - self._computed_at < self.reconcile_seconds
+            )
+            if fresh:
+                return self._derive(self._counts)
+        return self.recompute(db)
+
+    @contextmanager
+    def writing(self):
+        """
+        Wrap a write and its apply() call. A recompute whose query overlaps
+        the block isn't stored, since it can't tell whether the committed
+        row was counted before apply() adjusts for it.
+        """
+        with self._lock:
+            self._writers += 1
+            self._generation += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writers -= 1
+                self._generation += 1
+
+    def apply(self, before=None, after=None):
+        """
+        Account for one workstation changing from `before` to `after`.
+
+        Both are (status, updated_in_automate) tuples; pass None for `before`
+        on insert and for `after` on delete.
+        """
+        with self._lock:
+            self._generation += 1
+            if self._counts is None:
+                return
+            if before is not None:
+                self._counts[(before[0], bool(before[1]))] -= 1
+            if after is not None:
+                self._counts[(after[0], bool(after[1]))] += 1
+
+    def invalidate(self):
+        """Force the next snapshot to recompute (after imports and other bulk writes)."""
+        with self._lock:
+            self._generation += 1
+            self._counts = None
+
+    @staticmethod
+    def _derive(counts):
+        stats = {
+            "total": 0,
+            "completed": 0,
+            "in_progress": 0,
+            "not_started": 0,
+            "ready_to_upgrade": 0,
+            "completed_and_updated": 0,
+        }
+        for (status, automate), n in counts.items():
+            stats["total"] += n
+            if status == "Completed":
+                stats["completed"] += n
+                if automate:
+                    stats["completed_and_updated"] += n
+            elif status == "In Progress":
+                stats["in_progress"] += n
+            elif status == "Ready to Upgrade":
+                stats["ready_to_upgrade"] += n
+            elif status in NOT_STARTED_STATUSES:
+                stats["not_started"] += n
+        return stats
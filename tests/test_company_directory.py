@@ -0,0 +1,51 @@
+import json
+import time
+
+import pytest
+
+from company_directory import CompanyDirectory
+
+COMPANIES = [
+    {"id": 1, "name": "Acme Inc"},
+    {"id": 2, "name": "Acme LLC"},
+    {"id": 3, "name": "Olsen Computing, Inc."},
+]
+
+
+def loaded_from_cache(tmp_path):
+    path = tmp_path / "companies.json"
+    path.write_text(json.dumps({
+        "companies": COMPANIES, "refreshed_at": time.time(), "full_refreshed_at": time.time(),
+    }))
+    return CompanyDirectory(client=None, cache_path=str(path))
+
+
+def added_one_by_one(tmp_path):
+    directory = CompanyDirectory(client=None)
+    for company in COMPANIES:
+        directory.add(company)
+    return directory
+
+
+@pytest.fixture(params=[loaded_from_cache, added_one_by_one])
+def directory(request, tmp_path):
+    return request.param(tmp_path)
+
+
+def found_id(directory, name):
+    company = directory.find(name)
+    return company["id"] if company else None
+
+
+def test_companies_differing_only_by_suffix(directory):
+    assert found_id(directory, "Acme Inc") == 1
+    assert found_id(directory, "Acme LLC") == 2
+    assert found_id(directory, "acme  llc") == 2
+    assert found_id(directory, "Acme, LLC") == 2
+    # Both match equally well: leave it to the exact-name API lookup
+    assert found_id(directory, "Acme") is None
+
+
+def test_normalized_name_of_a_single_company(directory):
+    assert found_id(directory, "OLSEN COMPUTING LLC") == 3
+    assert found_id(directory, "Olsen Computng") == 3
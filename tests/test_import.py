@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Workstation
+from utils import import_csv_to_db
+
+ROWS = [
+    {"Client Name": "Company 1", "Computer Name": f"PC-{i:02d}", "RAM_GB": "8",
+     "Processor Name": "Intel(R) Core(TM) i5-7500 CPU @ 3.40GHz", "DiskSpaceRemaining_GB": str(100 + i)}
+    for i in range(20)
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_merge_updates_row_with_null_stored_hash(db, tmp_path):
+    import_csv_to_db(write_csv(tmp_path / "a.csv", ROWS), db)
+    # Rows added from the UI, or upgraded by the migration, have no hash
+    db.execute(update(Workstation).where(Workstation.computer_name == "PC-03").values(source_hash=None))
+    db.commit()
+
+    changed = [dict(row, RAM_GB="16") if row["Computer Name"] == "PC-03" else row for row in ROWS]
+    path = write_csv(tmp_path / "b.csv", changed)
+    report = import_csv_to_db(path, db, mode="merge")
+    assert (report["rows_updated"], report["rows_unchanged"]) == (1, len(ROWS) - 1)
+    ram, source_hash = db.execute(
+        select(Workstation.ram_gb, Workstation.source_hash).where(Workstation.computer_name == "PC-03")
+    ).one()
+    assert ram == "16" and source_hash is not None
+
+    # Every stored hash now matches exactly, so nothing is rewritten
+    report = import_csv_to_db(path, db, mode="merge")
+    assert (report["rows_updated"], report["rows_unchanged"]) == (0, len(ROWS))
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Workstation
+from stats import StatsService
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+
+    @event.listens_for(engine, "connect")
+    def wal(dbapi_connection, connection_record):
+        # Like the app: a writer can commit while a read is in progress
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add_all(Workstation(client_id=1, computer_name=f"PC-{i}", status="Assigned") for i in range(10))
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def set_status(factory, name, status):
+    with factory() as db:
+        db.execute(update(Workstation).where(Workstation.computer_name == name).values(status=status))
+        db.commit()
+
+
+def during_next_read(factory, fn):
+    """Run fn once, right after the next statement has executed (the GROUP BY has started reading)."""
+    event.listen(factory.kw["bind"], "after_cursor_execute", lambda *args: fn(), once=True)
+
+
+def expected(stats, **overrides):
+    return {**dict.fromkeys(stats, 0), "total": 10, **overrides}
+
+
+def test_apply_during_recompute_is_not_lost(session_factory):
+    service = StatsService(session_factory)
+    service.recompute()
+
+    def edit():
+        set_status(session_factory, "PC-1", "Completed")
+        service.apply(("Assigned", False), ("Completed", False))
+
+    during_next_read(session_factory, edit)
+    stale = service.recompute()
+    # The read started before the edit committed
+    assert stale["completed"] == 0
+    stats = service.snapshot()
+    assert stats == expected(stats, completed=1, not_started=9)
+
+
+def test_invalidate_during_recompute_is_not_undone(session_factory):
+    service = StatsService(session_factory)
+
+    def bulk_import():
+        with session_factory() as db:
+            db.execute(update(Workstation).values(status="In Progress"))
+            db.commit()
+        service.invalidate()
+
+    during_next_read(session_factory, bulk_import)
+    service.snapshot()
+    stats = service.snapshot()
+    assert stats == expected(stats, in_progress=10)
+
+
+def test_recompute_between_commit_and_apply_is_not_double_counted(session_factory):
+    service = StatsService(session_factory)
+    service.recompute()
+    with service.writing():
+        set_status(session_factory, "PC-1", "Completed")
+        # A dashboard render's reconcile lands between the commit and apply()
+        service.recompute()
+        service.apply(("Assigned", False), ("Completed", False))
+    stats = service.snapshot()
+    assert stats == expected(stats, completed=1, not_started=9)
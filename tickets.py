@@ -0,0 +1,139 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+
+class TicketJob:
+    """State of one bulk ticket run. Mutated only on the event loop."""
+
+    def __init__(self, clients):
+        self.id = uuid.uuid4().hex[:12]
+        self.clients = clients  # [(client_id, client_name)]
+        self.status = "queued"  # queued -> running -> completed / failed / cancelled
+        self.results = []
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = False
+
+    @property
+    def finished(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+    def counts(self):
+        counts = {"total": len(self.clients), "done": len(self.results), "created": 0, "skipped": 0, "failed": 0}
+        for result in self.results:
+            counts[result["status"]] += 1
+        return counts
+
+    def to_dict(self, results=False):
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "progress": self.counts(),
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if results:
+            data["results"] = self.results
+        return data
+
+
+class BulkTicketRunner:
+    """
+    Creates project tickets for many clients concurrently on the event loop.
+
+    `create_ticket(client_id, client_name)` does the work for one client and
+    returns a result dict with a "status" of created, skipped or failed; at
+    most `concurrency` run at once (the ConnectWise client's rate limiter
+    paces the actual requests). `on_update(job, result)` is awaited after
+    every client, with result None for job status changes. One job runs at
+    a time.
+    """
+
+    def __init__(self, create_ticket, concurrency=4, history=20, on_update=None):
+        self.create_ticket = create_ticket
+        self.concurrency = concurrency
+        self.history = history
+        self.on_update = on_update
+        self.jobs = OrderedDict()
+        self._task = None
+
+    @property
+    def running(self):
+        return next((job for job in self.jobs.values() if not job.finished), None)
+
+    def submit(self, clients):
+        """Start a job for [(client_id, client_name)]; None if one is already running."""
+        if self.running:
+            return None
+        job = TicketJob(clients)
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            self.jobs.popitem(last=False)
+        self._task = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return list(reversed(self.jobs.values()))
+
+    def cancel(self, job_id):
+        """Stop starting new clients; tickets already being created finish."""
+        job = self.get(job_id)
+        if not job or job.finished:
+            return False
+        job.cancelled = True
+        return True
+
+    async def shutdown(self):
+        for job in self.jobs.values():
+            job.cancelled = True
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    async def _notify(self, job, result=None):
+        if self.on_update:
+            try:
+                await self.on_update(job, result)
+            except Exception as e:
+                print(f"[TICKETS] Job update callback failed: {e}")
+
+    async def _run(self, job):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(client_id, client_name):
+            async with semaphore:
+                if job.cancelled:
+                    return
+                try:
+                    result = await self.create_ticket(client_id, client_name)
+                except Exception as e:
+                    result = {"client_id": client_id, "client_name": client_name, "status": "failed", "error": str(e)}
+                job.results.append(result)
+                await self._notify(job, result)
+
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        await self._notify(job)
+        try:
+            await asyncio.gather(*(one(client_id, name) for client_id, name in job.clients))
+            job.status = "cancelled" if job.cancelled else "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            counts = job.counts()
+            print(f"[TICKETS] Bulk run {job.status}: {counts['created']} created, "
+                  f"{counts['skipped']} skipped, {counts['failed']} failed of {counts['total']}")
+            await self._notify(job)
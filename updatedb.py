@@ -1,71 +1,282 @@
-# migrate_database.py
+# updatedb.py
 """
-Database migration script to add the updated_in_automate and completed_at columns
-to existing SQLite databases.
+Versioned schema migrations for existing SQLite databases.
 
-Run this script once to update your existing database schema.
+Applied versions are recorded in a schema_version table; pending migrations
+run in order, each in its own transaction. Every migration is idempotent, so
+databases created fresh by the app (which already have the current schema)
+can be brought under version tracking safely.
+
+    python updatedb.py              apply pending migrations
+    python updatedb.py --dry-run    print what would run without changing anything
+    python updatedb.py --status     show applied and pending versions
+    python updatedb.py --explain    check the dashboard filters use the indexes
 """
 
+import argparse
 import sqlite3
 import os
 from datetime import datetime
 
 DB_PATH = 'database.db'
 
-def migrate_database():
-    """Add new columns to existing database"""
-    if not os.path.exists(DB_PATH):
-        print(f"Database {DB_PATH} not found. Nothing to migrate.")
+
+class MigrationError(Exception):
+    pass
+
+
+class Migrator:
+    """Runs SQL for one migration, or only prints it in dry-run mode."""
+
+    def __init__(self, cursor, dry_run=False):
+        self.cursor = cursor
+        self.dry_run = dry_run
+
+    def query(self, sql, params=()):
+        """Read-only statements always run, so checks behave the same in dry-run mode."""
+        self.cursor.execute(sql, params)
+        return self.cursor.fetchall()
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        print(f"    SQL: {sql}" + (f"  {params}" if params else ""))
+        if self.dry_run:
+            return 0
+        self.cursor.execute(sql, params)
+        return self.cursor.rowcount
+
+    def columns(self, table):
+        return [column[1] for column in self.query(f"PRAGMA table_info({table})")]
+
+    def has_table(self, table):
+        return bool(self.query("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)))
+
+
+def migrate_automate_columns(m):
+    """Add updated_in_automate and completed_at columns"""
+    columns = m.columns("workstations")
+
+    if 'updated_in_automate' not in columns:
+        print("  Adding updated_in_automate column...")
+        m.execute("ALTER TABLE workstations ADD COLUMN updated_in_automate BOOLEAN DEFAULT 0")
+    else:
+        print("  Column updated_in_automate already exists.")
+
+    if 'completed_at' not in columns:
+        print("  Adding completed_at column...")
+        m.execute("ALTER TABLE workstations ADD COLUMN completed_at DATETIME")
+        # Update completed_at for existing completed workstations
+        print("  Setting completed_at for existing completed workstations...")
+        affected_rows = m.execute("""
+            UPDATE workstations
+            SET completed_at = ?
+            WHERE status = 'Completed' AND completed_at IS NULL
+        """, (datetime.utcnow(),))
+        print(f"  ✓ Updated {affected_rows} completed workstations with timestamp.")
+    else:
+        print("  Column completed_at already exists.")
+
+
+def migrate_source_hash(m):
+    """Add source_hash column (row fingerprint used by merge imports)"""
+    if 'source_hash' not in m.columns("workstations"):
+        print("  Adding source_hash column...")
+        m.execute("ALTER TABLE workstations ADD COLUMN source_hash INTEGER")
+    else:
+        print("  Column source_hash already exists.")
+
+
+# Keep in sync with Workstation.__table_args__ in models.py
+WORKSTATION_INDEXES = [
+    ("ux_workstations_client_computer", "client_id, computer_name", True),
+    ("ix_workstations_status_automate", "status, updated_in_automate", False),
+    ("ix_workstations_automate", "updated_in_automate", False),
+    ("ix_workstations_technician_status", "technician, status", False),
+    ("ix_workstations_ram_gb", "ram_gb", False),
+]
+
+
+def migrate_indexes(m):
+    """Add indexes for the dashboard filters and a unique (client_id, computer_name) index"""
+    duplicates = m.query("""
+        SELECT c.name, w.computer_name, COUNT(*)
+        FROM workstations w LEFT JOIN clients c ON c.id = w.client_id
+        GROUP BY w.client_id, w.computer_name
+        HAVING COUNT(*) > 1
+        LIMIT 20
+    """)
+    if duplicates:
+        listing = "\n".join(f"    {client} / {computer} ({count} rows)" for client, computer, count in duplicates)
+        raise MigrationError(
+            "Duplicate (client, computer name) rows must be renamed or removed before "
+            f"the unique index can be created, e.g.:\n{listing}"
+        )
+    for name, columns, unique in WORKSTATION_INDEXES:
+        print(f"  Creating index {name}...")
+        m.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON workstations ({columns})")
+
+
+def migrate_fulltext_search(m):
+    """Add the FTS5 search index over workstation text fields and its sync triggers"""
+    from search import FTS_DDL, FTS_REBUILD
+
+    if "ENABLE_FTS5" not in {row[0] for row in m.query("PRAGMA compile_options")}:
+        print("  This SQLite build has no FTS5; search will keep using LIKE.")
+        return
+    for statement in FTS_DDL + FTS_REBUILD:
+        m.execute(statement)
+
+
+def migrate_project_tickets(m):
+    """Add the project_tickets table (tickets created per client, so bulk runs skip them)"""
+    if m.has_table("project_tickets"):
+        print("  Table project_tickets already exists.")
         return
-    
-    conn = sqlite3.connect(DB_PATH)
+    print("  Creating project_tickets table...")
+    m.execute("""
+        CREATE TABLE project_tickets (
+            id INTEGER NOT NULL PRIMARY KEY,
+            client_name VARCHAR NOT NULL UNIQUE,
+            ticket_id INTEGER NOT NULL,
+            cw_company_id INTEGER,
+            created_at DATETIME
+        )
+    """)
+
+
+# (version, migration) in the order they must be applied. Never renumber.
+MIGRATIONS = [
+    (1, migrate_automate_columns),
+    (2, migrate_source_hash),
+    (3, migrate_indexes),
+    (4, migrate_fulltext_search),
+    (5, migrate_project_tickets),
+]
+
+
+def applied_versions(m):
+    if not m.has_table("schema_version"):
+        return set()
+    return {row[0] for row in m.query("SELECT version FROM schema_version")}
+
+
+def migrate_database(db_path=DB_PATH, dry_run=False):
+    """Apply pending migrations in order. Returns the number applied."""
+    if not os.path.exists(db_path):
+        print(f"Database {db_path} not found. Nothing to migrate.")
+        return 0
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
-    
+    m = Migrator(cursor, dry_run=dry_run)
+    applied = 0
     try:
-        # Check if columns already exist
-        cursor.execute("PRAGMA table_info(workstations)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        # Add updated_in_automate column if it doesn't exist
-        if 'updated_in_automate' not in columns:
-            print("Adding updated_in_automate column...")
-            cursor.execute("""
-                ALTER TABLE workstations 
-                ADD COLUMN updated_in_automate BOOLEAN DEFAULT 0
-            """)
-            print("✓ Column updated_in_automate added successfully!")
-        else:
-            print("Column updated_in_automate already exists.")
-        
-        # Add completed_at column if it doesn't exist
-        if 'completed_at' not in columns:
-            print("Adding completed_at column...")
+        if not m.has_table("workstations"):
+            print("No workstations table yet; start the app once to create the schema.")
+            return 0
+        done = applied_versions(m)
+        pending = [(version, fn) for version, fn in MIGRATIONS if version not in done]
+        if not pending:
+            print("Schema is up to date.")
+            return 0
+        if not dry_run:
             cursor.execute("""
-                ALTER TABLE workstations 
-                ADD COLUMN completed_at DATETIME
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at DATETIME
+                )
             """)
-            print("✓ Column completed_at added successfully!")
-            
-            # Update completed_at for existing completed workstations
-            print("Setting completed_at for existing completed workstations...")
-            cursor.execute("""
-                UPDATE workstations 
-                SET completed_at = ? 
-                WHERE status = 'Completed' AND completed_at IS NULL
-            """, (datetime.utcnow(),))
-            affected_rows = cursor.rowcount
-            print(f"✓ Updated {affected_rows} completed workstations with timestamp.")
-        else:
-            print("Column completed_at already exists.")
-        
-        conn.commit()
-        print("\nMigration completed successfully!")
-        
-    except sqlite3.Error as e:
-        print(f"Error during migration: {e}")
-        conn.rollback()
+        for version, fn in pending:
+            description = fn.__doc__.strip()
+            print(f"{'[dry run] ' if dry_run else ''}Migration {version}: {description}")
+            if not dry_run:
+                cursor.execute("BEGIN")
+            try:
+                fn(m)
+                if not dry_run:
+                    cursor.execute(
+                        "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                        (version, description, datetime.utcnow()),
+                    )
+                    cursor.execute("COMMIT")
+                    print(f"✓ Migration {version} applied.")
+                applied += 1
+            except (sqlite3.Error, MigrationError) as e:
+                if not dry_run:
+                    cursor.execute("ROLLBACK")
+                print(f"Error during migration {version}: {e}")
+                break
+        if not dry_run and applied == len(pending):
+            print("\nMigration completed successfully!")
+    finally:
+        conn.close()
+    return applied
+
+
+def show_status(db_path=DB_PATH):
+    if not os.path.exists(db_path):
+        print(f"Database {db_path} not found.")
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        done = applied_versions(Migrator(conn.cursor()))
+    finally:
+        conn.close()
+    for version, fn in MIGRATIONS:
+        state = "applied" if version in done else "pending"
+        print(f"  {version:>3}  {state:<8} {fn.__doc__.strip()}")
+
+
+def explain_dashboard_filters(db_path=DB_PATH):
+    """
+    Run EXPLAIN QUERY PLAN on the statements build_dashboard_context issues for
+    each filter and check that workstations is searched through an index.
+    Returns True when every filter uses one.
+    """
+    from sqlalchemy import select
+    from sqlalchemy.dialects import sqlite
+    from models import Workstation
+    from queries import filter_workstations
+
+    checks = {
+        "status": {"status": "Ready to Upgrade"},
+        "technician": {"technician": "Steven"},
+        "ram": {"ram": "8"},
+        "automate": {"automate": "updated"},
+        "client": {"client": "Company 1"},
+        "status + technician": {"status": "In Progress", "technician": "Ed"},
+    }
+    conn = sqlite3.connect(db_path)
+    all_ok = True
+    try:
+        for label, filters in checks.items():
+            stmt = filter_workstations(select(Workstation), **filters)
+            sql = str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            uses_index = any(
+                "workstations" in step and "USING" in step and "INDEX" in step for step in plan
+            )
+            all_ok = all_ok and uses_index
+            print(f"{'✓' if uses_index else '✗'} {label}")
+            for step in plan:
+                print(f"    {step}")
     finally:
         conn.close()
+    return all_ok
+
 
 if __name__ == "__main__":
-    migrate_database()
+    parser = argparse.ArgumentParser(description="Apply schema migrations to the dashboard database.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="print pending migrations without applying them")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--explain", action="store_true", help="check the dashboard filters use indexes")
+    args = parser.parse_args()
+
+    if args.status:
+        show_status(args.db)
+    elif args.explain:
+        raise SystemExit(0 if explain_dashboard_filters(args.db) else 1)
+    else:
+        migrate_database(args.db, dry_run=args.dry_run)
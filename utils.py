@@ -1,86 +1,372 @@
+import os
+import time
 import pandas as pd
+from sqlalchemy import insert, select, delete, update, bindparam
 from sqlalchemy.orm import Session
 from models import Client, Workstation
 from datetime import datetime
 
-def import_csv_to_db(csv_path, db: Session):
-    # Clear existing data
-    db.query(Workstation).delete()
-    db.query(Client).delete()
-    db.commit()
-
-    df = pd.read_csv(csv_path)
-    for _, row in df.iterrows():
-        client_name = str(row.get("Client Name", "")).strip()
-        if not client_name:
-            continue
-        client = db.query(Client).filter_by(name=client_name).first()
-        if not client:
-            client = Client(name=client_name)
-            db.add(client)
-            db.flush()
-        
-        # Check if this workstation was already completed
-        status = str(row.get("Status", "Pending Upgrade"))
-        completed_at = None
-        if status == "Completed":
-            # If there's a completed date in the CSV, use it
-            if "Completed Date" in df.columns and pd.notna(row.get("Completed Date")):
-                try:
-                    completed_at = datetime.strptime(str(row.get("Completed Date")), "%Y-%m-%d %H:%M")
-                except:
-                    completed_at = datetime.utcnow()
-            else:
-                completed_at = datetime.utcnow()
-        
-        # Check for updated_in_automate field
-        updated_in_automate = False
-        if "Updated in Automate" in df.columns:
-            automate_val = str(row.get("Updated in Automate", "")).lower()
-            updated_in_automate = automate_val in ['yes', 'true', '1']
-        
-        ws = Workstation(
-            client=client,
-            computer_name=str(row.get("Computer Name", "")),
-            ram_gb=str(row.get("RAM_GB", "")),
-            processor_name=str(row.get("Processor Name", "")),
-            diskspace_remaining_gb=str(row.get("DiskSpaceRemaining_GB", "")),
-            status=status,
-            technician=str(row.get("Technician", "")),
-            notes=str(row.get("Notes", "")),
-            updated_in_automate=updated_in_automate,
-            completed_at=completed_at
+# CSV header -> workstations column, for the plain text columns
+CSV_TEXT_COLUMNS = {
+    "Computer Name": "computer_name",
+    "RAM_GB": "ram_gb",
+    "Processor Name": "processor_name",
+    "DiskSpaceRemaining_GB": "diskspace_remaining_gb",
+    "Technician": "technician",
+    "Notes": "notes",
+}
+# Columns that feed a row's fingerprint; Client Name / Computer Name are the merge key
+FINGERPRINT_COLUMNS = [
+    "RAM_GB", "Processor Name", "DiskSpaceRemaining_GB",
+    "Status", "Technician", "Notes", "Updated in Automate", "Completed Date",
+]
+COMPLETED_DATE_FORMAT = "%Y-%m-%d %H:%M"
+IMPORT_BATCH_SIZE = 5000
+IMPORT_MODES = ("replace", "merge")
+PARQUET_MAGIC = b"PAR1"
+
+
+def _text_column(df, column, default=""):
+    """Return `column` as a string Series, or `default` for every row if it is missing."""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[column].fillna(default).astype(str)
+
+
+def row_fingerprints(df):
+    """Stable 64-bit hash of each row's source columns, as signed ints for SQLite."""
+    columns = [c for c in FINGERPRINT_COLUMNS if c in df.columns]
+    if not columns:
+        return pd.Series(0, index=df.index, dtype="int64")
+    hashes = pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+    return pd.Series(hashes.to_numpy().view("int64"), index=df.index)
+
+
+def updatable_columns(df):
+    """Workstation columns a merge may overwrite: only those the file actually provides."""
+    columns = [db_col for csv_col, db_col in CSV_TEXT_COLUMNS.items()
+               if csv_col in df.columns and db_col != "computer_name"]
+    if "Status" in df.columns:
+        columns += ["status", "completed_at"]
+    if "Updated in Automate" in df.columns:
+        columns.append("updated_in_automate")
+    columns.append("source_hash")
+    return columns
+
+
+def normalize_workstation_frame(df, now=None):
+    """
+    Turn a raw CSV DataFrame into rows shaped like the workstations table.
+
+    Everything is done with column operations; the result has a `client_name`
+    column plus one column per Workstation field (except ids).
+    """
+    now = now or datetime.utcnow()
+    out = pd.DataFrame(index=df.index)
+    out["client_name"] = _text_column(df, "Client Name").str.strip()
+    for csv_col, db_col in CSV_TEXT_COLUMNS.items():
+        out[db_col] = _text_column(df, csv_col)
+
+    status = _text_column(df, "Status", "Pending Upgrade")
+    status = status.mask(status.str.strip() == "", "Pending Upgrade")
+    out["status"] = status
+
+    # Completed rows keep the CSV date when it parses, otherwise "now"
+    completed = status == "Completed"
+    if "Completed Date" in df.columns:
+        parsed = pd.to_datetime(df["Completed Date"], format=COMPLETED_DATE_FORMAT, errors="coerce")
+    else:
+        parsed = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    parsed = parsed.fillna(pd.Timestamp(now))
+    out["completed_at"] = pd.Series(
+        [ts.to_pydatetime() if done else None for ts, done in zip(parsed, completed)],
+        index=df.index,
+        dtype=object,
+    )
+
+    automate = _text_column(df, "Updated in Automate").str.strip().str.lower()
+    out["updated_in_automate"] = automate.isin(["yes", "true", "1"]).astype(object)
+    out["source_hash"] = row_fingerprints(df)
+
+    # Rows without a client are skipped, same as the row-by-row importer did
+    return out[out["client_name"] != ""]
+
+
+def resolve_client_ids(db: Session, names, cache=None):
+    """
+    Make sure every client name exists and return a name -> id map.
+
+    New names are inserted in one statement; ids are then read back in a
+    single lookup per 500 names (SQLite's bound parameter limit).
+    """
+    cache = {} if cache is None else cache
+    missing = [name for name in pd.unique(names) if name not in cache]
+    if missing:
+        db.execute(
+            insert(Client.__table__).prefix_with("OR IGNORE"),
+            [{"name": name} for name in missing],
         )
-        db.add(ws)
-    db.commit()
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            for client_id, name in db.execute(
+                select(Client.id, Client.name).where(Client.name.in_(chunk))
+            ):
+                cache[name] = client_id
+    return cache
+
+
+def insert_workstation_rows(db: Session, frame, client_ids, batch_size=IMPORT_BATCH_SIZE):
+    """Insert a normalized frame with batched Core executemany calls. Returns the row count."""
+    if frame.empty:
+        return 0
+    rows = frame.drop(columns=["client_name"])
+    rows["client_id"] = frame["client_name"].map(client_ids)
+    records = rows.to_dict("records")
+    stmt = insert(Workstation.__table__)
+    for i in range(0, len(records), batch_size):
+        db.execute(stmt, records[i:i + batch_size])
+    return len(records)
+
+
+def update_workstation_rows(db: Session, frame, ids, columns, batch_size=IMPORT_BATCH_SIZE):
+    """Overwrite `columns` on existing workstations (matched positionally with `ids`)."""
+    if frame.empty:
+        return 0
+    table = Workstation.__table__
+    rows = frame[columns].copy()
+    rows["_id"] = [int(i) for i in ids]
+    records = rows.to_dict("records")
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values({col: bindparam(col) for col in columns})
+    )
+    for i in range(0, len(records), batch_size):
+        db.execute(stmt, records[i:i + batch_size])
+    return len(records)
+
+
+def load_existing_workstations(db: Session):
+    """(client_id, computer_name) -> id/source_hash for every stored workstation."""
+    table = Workstation.__table__
+    rows = db.execute(select(table.c.client_id, table.c.computer_name, table.c.id, table.c.source_hash)).all()
+    # Nullable Int64 straight from the Python ints: going through float64
+    # (what a NULL hash would force) loses precision on 64-bit hashes
+    existing = pd.DataFrame({
+        "client_id": [row.client_id for row in rows],
+        "computer_name": [row.computer_name for row in rows],
+        "id": pd.array([row.id for row in rows], dtype="Int64"),
+        "source_hash": pd.array([row.source_hash for row in rows], dtype="Int64"),
+    }).set_index(["client_id", "computer_name"])
+    # Older databases may hold duplicate keys; the first one is the merge target
+    return existing[~existing.index.duplicated()]
+
+
+def _delete_ids(db: Session, ids):
+    table = Workstation.__table__
+    ids = list(ids)
+    for i in range(0, len(ids), 500):
+        db.execute(delete(table).where(table.c.id.in_(ids[i:i + 500])))
+    return len(ids)
+
+
+def detect_import_format(source):
+    """'parquet' for Parquet files (by extension or magic bytes), otherwise 'csv'."""
+    if isinstance(source, (str, os.PathLike)):
+        if str(source).lower().endswith((".parquet", ".pq")):
+            return "parquet"
+        with open(source, "rb") as fh:
+            head = fh.read(4)
+    else:
+        position = source.tell()
+        head = source.read(4)
+        source.seek(position)
+    return "parquet" if head == PARQUET_MAGIC else "csv"
+
+
+def read_import_chunks(source, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Yield DataFrames of at most `batch_size` rows from a CSV or Parquet file.
+
+    CSV columns are read as raw text; Parquet columns keep their types and
+    are read one record batch at a time.
+    """
+    if detect_import_format(source) == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=batch_size):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(
+        source,
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        chunksize=batch_size,
+    )
+
+
+def iter_import_batches(source, db: Session, batch_size=IMPORT_BATCH_SIZE, mode="replace", delete_missing=False):
+    """
+    Stream a CSV or Parquet file (path or binary file object) into the
+    database in fixed-size batches.
+
+    Workstations are unique per (Client Name, Computer Name); repeated keys
+    in the file are skipped and counted as `duplicates`.
+
+    mode="replace" wipes clients and workstations first. mode="merge" keys
+    rows on (Client Name, Computer Name): new machines are inserted, rows
+    whose fingerprint changed since the last import are updated (only the
+    columns present in the file, so local edits to other fields survive),
+    unchanged rows are not written at all, and with `delete_missing` the
+    machines absent from the file are removed.
+
+    Only one batch is held in memory at a time. Everything happens in a
+    single transaction, so a failed or abandoned import leaves the previous
+    data in place. Yields a progress dict after every batch; the last one is
+    the final report, with `done` set, once the transaction has committed.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode: {mode}")
+    started = time.perf_counter()
+    counts = {
+        "rows_parsed": 0,
+        "rows_inserted": 0,
+        "rows_updated": 0,
+        "rows_unchanged": 0,
+        "rows_deleted": 0,
+        "duplicates": 0,
+    }
+    client_ids = {}
+    seen_keys = set()
+    seen_ids = set()
+    try:
+        if mode == "replace":
+            db.execute(delete(Workstation.__table__))
+            db.execute(delete(Client.__table__))
+        else:
+            existing = load_existing_workstations(db)
+            client_ids.update((name, cid) for cid, name in db.execute(select(Client.id, Client.name)))
+
+        for chunk in read_import_chunks(source, batch_size):
+            counts["rows_parsed"] += len(chunk)
+            frame = normalize_workstation_frame(chunk)
+            resolve_client_ids(db, frame["client_name"], client_ids)
+
+            # (client, computer name) is unique; later repeats in the file are skipped
+            keys = list(zip(frame["client_name"].map(client_ids), frame["computer_name"]))
+            first_seen = []
+            for key in keys:
+                first_seen.append(key not in seen_keys)
+                seen_keys.add(key)
+            first_seen = pd.Series(first_seen, index=frame.index, dtype=bool)
+            counts["duplicates"] += int((~first_seen).sum())
+            frame = frame[first_seen]
+            keys = [k for k, first in zip(keys, first_seen) if first]
+
+            if mode == "replace":
+                counts["rows_inserted"] += insert_workstation_rows(db, frame, client_ids, batch_size)
+                yield {"done": False, **counts}
+                continue
+
+            matched = existing.reindex(pd.MultiIndex.from_tuples(keys, names=existing.index.names))
+            matched.index = frame.index
+            is_new = matched["id"].isna()
+            # No stored hash (added in the UI, or from before fingerprints) counts as changed
+            is_changed = ~is_new & (
+                matched["source_hash"].isna() | (matched["source_hash"] != frame["source_hash"])
+            ).fillna(True).astype(bool)
+            seen_ids.update(int(i) for i in matched.loc[~is_new, "id"])
+
+            counts["rows_inserted"] += insert_workstation_rows(db, frame[is_new], client_ids, batch_size)
+            counts["rows_updated"] += update_workstation_rows(
+                db, frame[is_changed], matched.loc[is_changed, "id"], updatable_columns(chunk), batch_size
+            )
+            counts["rows_unchanged"] += int((~is_new & ~is_changed).sum())
+            yield {"done": False, **counts}
+
+        if mode == "merge" and delete_missing:
+            missing = set(int(i) for i in existing["id"]) - seen_ids
+            counts["rows_deleted"] = _delete_ids(db, missing)
+            db.execute(delete(Client.__table__).where(~Client.workstations.any()))
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+
+    seconds = time.perf_counter() - started
+    written = counts["rows_inserted"] + counts["rows_updated"]
+    report = {
+        "done": True,
+        "mode": mode,
+        **counts,
+        "clients": len(client_ids),
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(counts["rows_parsed"] / seconds) if seconds else counts["rows_parsed"],
+    }
+    print(f"[IMPORT] {mode}: {counts['rows_parsed']} rows in {seconds:.2f}s "
+          f"({counts['rows_inserted']} inserted, {counts['rows_updated']} updated, "
+          f"{counts['rows_unchanged']} unchanged, {counts['rows_deleted']} deleted, "
+          f"{counts['duplicates']} duplicate client/computer rows skipped; "
+          f"{written} written, {report['rows_per_second']} rows/s)")
+    yield report
+
+
+def import_csv_to_db(csv_path, db: Session, batch_size=IMPORT_BATCH_SIZE, mode="replace", delete_missing=False):
+    """Import a CSV file (see iter_import_batches for the modes). Returns the final import report."""
+    report = None
+    for report in iter_import_batches(csv_path, db, batch_size, mode=mode, delete_missing=delete_missing):
+        pass
+    return report
 
 def export_workstations(workstations, export_type='csv'):
+    """
+    Export workstation ORM objects with import-compatible headers.
+
+    Rows are written as they are read (csv module / openpyxl write-only
+    mode) instead of being collected into a DataFrame first.
+    """
     import io
-    import pandas as pd
+    import csv
+    from openpyxl import Workbook
+
+    header = [
+        "Client Name", "Computer Name", "RAM_GB", "Processor Name", "DiskSpaceRemaining_GB",
+        "Status", "Technician", "Notes", "Updated in Automate", "Completed Date",
+    ]
+
+    def rows():
+        for ws in workstations:
+            yield [
+                ws.client.name if ws.client else "",
+                ws.computer_name,
+                ws.ram_gb,
+                ws.processor_name,
+                ws.diskspace_remaining_gb,
+                ws.status,
+                ws.technician,
+                ws.notes,
+                "Yes" if ws.updated_in_automate else "No",
+                ws.completed_at.strftime(COMPLETED_DATE_FORMAT) if ws.completed_at else "",
+            ]
 
-    # Build a DataFrame from workstation ORM objects
-    data = []
-    for ws in workstations:
-        data.append({
-            "Client Name": ws.client.name if ws.client else "",
-            "Computer Name": ws.computer_name,
-            "RAM_GB": ws.ram_gb,
-            "Processor Name": ws.processor_name,
-            "DiskSpaceRemaining_GB": ws.diskspace_remaining_gb,
-            "Status": ws.status,
-            "Technician": ws.technician,
-            "Notes": ws.notes,
-            "Updated in Automate": "Yes" if ws.updated_in_automate else "No",
-            "Completed Date": ws.completed_at.strftime("%Y-%m-%d %H:%M") if ws.completed_at else ""
-        })
-    df = pd.DataFrame(data)
     buf = io.BytesIO()
     if export_type == 'csv':
-        df.to_csv(buf, index=False)
+        text = io.TextIOWrapper(buf, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(header)
+        writer.writerows(rows())
+        text.flush()
+        text.detach()
         buf.seek(0)
         return buf, 'text/csv', 'export.csv'
     elif export_type == 'xlsx':
-        df.to_excel(buf, index=False)
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Workstations")
+        sheet.append(header)
+        for row in rows():
+            sheet.append(row)
+        workbook.save(buf)
         buf.seek(0)
         return buf, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'export.xlsx'
     return None, None, None
@@ -0,0 +1,139 @@
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from sqlalchemy.exc import OperationalError
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Serializes small writes through a single writer thread and group-commits them.
+
+    Jobs are `fn(db, *args)` callables that change the session and return a
+    result without committing. The writer collects whatever is queued within
+    `batch_window` seconds (up to `max_batch` jobs), runs each in its own
+    SAVEPOINT inside one BEGIN IMMEDIATE transaction and commits once, so a
+    burst of inline edits costs one fsync instead of one each. A job that
+    raises only rolls back its own savepoint; its future gets the exception
+    and the rest of the batch still commits.
+
+    If another writer (an import) holds the database lock, the whole batch
+    is retried until `lock_timeout` seconds have passed.
+    """
+
+    def __init__(self, session_factory, max_batch=64, batch_window=0.002, lock_timeout=120.0):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.lock_timeout = lock_timeout
+        self.jobs = 0
+        self.batches = 0
+        self.failed = 0
+        self.lock_retries = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(db, *args, **kwargs); returns a Future for its result."""
+        future = Future()
+        # The job runs in the submitter's context, so its SQL counts toward that request
+        self._queue.put((future, fn, args, kwargs, contextvars.copy_context()))
+        return future
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "jobs": self.jobs,
+            "commits": self.batches,
+            "avg_batch": round(self.jobs / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "failed": self.failed,
+            "lock_retries": self.lock_retries,
+        }
+
+    def shutdown(self, wait=True):
+        self._queue.put(_STOP)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(item)
+            batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+            if batch:
+                self._commit(batch)
+
+    @staticmethod
+    def _apply(db, fn, args, kwargs):
+        result = fn(db, *args, **kwargs)
+        db.flush()
+        return result
+
+    def _commit(self, batch):
+        started = time.monotonic()
+        while True:
+            db = self.session_factory()
+            outcomes = []
+            try:
+                # Take the write lock up front so lock waits happen before any work
+                db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                for future, fn, args, kwargs, context in batch:
+                    savepoint = db.begin_nested()
+                    try:
+                        result = context.run(self._apply, db, fn, args, kwargs)
+                        savepoint.commit()
+                        outcomes.append((future, result, None))
+                    except OperationalError:
+                        raise
+                    except Exception as e:
+                        savepoint.rollback()
+                        outcomes.append((future, None, e))
+                db.commit()
+            except OperationalError as e:
+                db.rollback()
+                db.close()
+                if "locked" in str(e) and time.monotonic() - started < self.lock_timeout:
+                    self.lock_retries += 1
+                    time.sleep(0.05)
+                    continue
+                print(f"[DB] Write batch of {len(batch)} failed: {e}")
+                self.failed += len(batch)
+                for future, *_ in batch:
+                    future.set_exception(e)
+                return
+            except BaseException as e:
+                db.rollback()
+                db.close()
+                self.failed += len(batch)
+                for future, *_ in batch:
+                    future.set_exception(e)
+                return
+            db.close()
+            self.batches += 1
+            self.jobs += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for future, result, error in outcomes:
+                if error is not None:
+                    self.failed += 1
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            return